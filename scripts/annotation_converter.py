@@ -19,6 +19,12 @@ import json
 import glob
 import re
 
+# Compiled once at import: parse_markdown_annotation runs per page file. Both
+# patterns are anchored with no nested quantifiers, so the stdlib engine
+# already matches them in linear time.
+META_DELIMITER_RE = re.compile(r'^~~~meta$|^~~~$|^---$', re.MULTILINE)
+COORDS_TARGET_RE = re.compile(r'^\[(\d+),\s*(\d+)\]$')
+
 def convert_json_to_md(json_file_path):
     """
     Convert a JSON annotation file to Markdown format according to the specification.
@@ -80,7 +86,7 @@ def parse_markdown_annotation(md_content):
         list: List of annotation dictionaries
     """
     # Split the content by the meta block delimiter (supporting both old and new formats)
-    sections = re.split(r'^~~~meta$|^~~~$|^---$', md_content, flags=re.MULTILINE)
+    sections = META_DELIMITER_RE.split(md_content)
 
     # Remove empty sections
     sections = [s.strip() for s in sections if s.strip()]
@@ -121,7 +127,7 @@ def parse_markdown_annotation(md_content):
             target_value = metadata_dict['target'].strip()
 
             # Check if target is in the format [X, Y]
-            coords_match = re.match(r'^\[(\d+),\s*(\d+)\]$', target_value)
+            coords_match = COORDS_TARGET_RE.match(target_value)
             if coords_match:
                 # If target contains coordinates, extract them
                 x, y = map(int, coords_match.groups())
@@ -1,5 +1,5 @@
 import os
-from typing import Dict, List, Union
+from typing import Dict, List, Tuple, Union
 
 # Defaults per spec
 DEFAULT_STORAGE_DIR = "/data"
@@ -39,6 +39,15 @@ def cors_settings(origins: List[str]):
     return origins, allow_credentials
 
 
+# Fixed CORS method/header lists. Starlette's CORSMiddleware joins these into
+# its preflight headers once, at install time; the per-request win left is on
+# the browser side, so let it cache a preflight for 2h (Chromium's cap)
+# instead of Starlette's default 10 min.
+CORS_ALLOW_METHODS: Tuple[str, ...] = ("GET", "POST", "PUT", "DELETE", "OPTIONS")
+CORS_ALLOW_HEADERS: Tuple[str, ...] = ("Content-Type", "X-CSRF-Token")
+CORS_MAX_AGE_SECONDS = 7200
+
+
 def _parse_cors_origins(value: str) -> Union[List[str], List[str]]:
     """
     Parse CORS_ALLOW_ORIGINS environment value into a list for CORSMiddleware.
@@ -96,3 +105,24 @@ COOKIE_SECURE: bool = os.getenv("COOKIE_SECURE", "true").strip().lower() not in
 # annotations/page_NNN.json snapshots into (stage 2). Empty -> publication is
 # disabled (tests, local dev without the redpen_public volume mounted).
 PUBLISH_DIR: str = os.getenv("PUBLISH_DIR", "")
+
+# Indent published page_NNN.json files (2 spaces), the same bytes
+# export_annotations.py writes. On by default: the publish tree is copied into
+# the redpen-publish git clone, where compact files would turn every diff into
+# a one-line rewrite. Set to false only for a volume that never reaches git
+# (compact files are 2-3x smaller). API responses are always compact.
+PUBLISH_PRETTY_JSON: bool = os.getenv("PUBLISH_PRETTY_JSON", "true").strip().lower() in ("1", "true", "yes")
+
+# fsync inbox, published and exported page files before the atomic rename. Off by
+# default: os.replace() already gives atomic visibility, published pages are
+# re-rendered from the DB on startup (publish_all), and the inbox is a raw
+# audit dump, so only a power loss in the last few seconds is at stake --
+# while an fsync per request dominates write latency.
+FSYNC_WRITES: bool = os.getenv("FSYNC_WRITES", "false").strip().lower() in ("1", "true", "yes")
+
+# Hash behind serverPageSha. It is an opaque fingerprint clients only echo
+# back (clientPageSha), so it needn't be SHA-256: "blake2b" (stdlib) or
+# "blake3" (optional `blake3` package, falls back to sha256 without it) are
+# faster on large pages where the CPU lacks SHA extensions. Switching it
+# changes every page's sha, so open editors get one 409.
+PAGE_SHA_ALGO: str = os.getenv("PAGE_SHA_ALGO", "sha256").strip().lower()
@@ -20,6 +20,15 @@ SESSION_TTL_SECONDS = 30 * 86400  # 30 days, matches the auth cookie max_age
 _lock = threading.Lock()
 _conn: Optional[sqlite3.Connection] = None
 
+# Bumped (under _lock) whenever a page's annotation rows change, so callers can
+# key caches on page_generation() instead of re-querying. _epoch changes on
+# every init_db() since a new connection may point at a different DB file.
+# Writes made outside this process (import_annotations.py, a manual sqlite3
+# session) are caught by SQLite's PRAGMA data_version, which page_generation()
+# folds in. Replacing the DB file itself (a restore) still needs a restart.
+_epoch = 0
+_page_generations: Dict[Tuple[str, str], int] = {}
+
 
 def _now_iso() -> str:
     return datetime.utcnow().isoformat()
@@ -34,11 +43,13 @@ def get_connection() -> sqlite3.Connection:
 
 def init_db() -> None:
     """Create the DB file/directory and schema if missing. Idempotent."""
-    global _conn
+    global _conn, _epoch
     os.makedirs(os.path.dirname(config.DB_PATH), exist_ok=True)
     _conn = sqlite3.connect(config.DB_PATH, check_same_thread=False)
     _conn.row_factory = sqlite3.Row
     with _lock:
+        _epoch += 1
+        _page_generations.clear()
         _conn.execute("PRAGMA journal_mode=WAL")
         _conn.executescript(
             """
@@ -59,6 +70,7 @@ def init_db() -> None:
               created_at TEXT NOT NULL,
               expires_at TEXT NOT NULL
             );
+            CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at);
             CREATE TABLE IF NOT EXISTS editor_allowlist (
               email TEXT PRIMARY KEY,
               role TEXT NOT NULL DEFAULT 'editor',
@@ -189,6 +201,9 @@ def create_session(user_id: int) -> str:
     now = datetime.utcnow()
     expires_at = now + timedelta(seconds=SESSION_TTL_SECONDS)
     with _lock:
+        # get_session only evicts sessions that are looked up again; sweep the
+        # rest here so abandoned sessions don't pile up forever.
+        conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now.isoformat(),))
         conn.execute(
             "INSERT INTO sessions (id, user_id, csrf, created_at, expires_at) VALUES (?, ?, NULL, ?, ?)",
             (session_id, user_id, now.isoformat(), expires_at.isoformat()),
@@ -377,6 +392,24 @@ def get_annotation(doc_id: str, page_num: str, ann_id: str) -> Optional[Dict[str
     return _annotation_row_to_dict(row) if row else None
 
 
+def _bump_page_generation(doc_id: str, page_num: str) -> None:
+    # Caller holds _lock.
+    key = (doc_id, page_num)
+    _page_generations[key] = _page_generations.get(key, 0) + 1
+
+
+def page_generation(doc_id: str, page_num: str) -> Tuple[int, int, int]:
+    """Opaque version of a page's annotation rows; changes after every write
+    to that page through this module, after init_db, and after any commit to
+    the DB from another connection (which invalidates every page)."""
+    conn = get_connection()
+    with _lock:
+        # data_version only moves for other connections' commits; our own
+        # writes are tracked per page by _bump_page_generation().
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        return _epoch, data_version, _page_generations.get((doc_id, page_num), 0)
+
+
 def upsert_annotation_db(
     doc_id: str,
     page_num: str,
@@ -417,6 +450,7 @@ def upsert_annotation_db(
         ann = _annotation_row_to_dict(row)
         _insert_history(conn, doc_id, page_num, ann_id, action, ann, author_id)
         conn.commit()
+        _bump_page_generation(doc_id, page_num)
     return ann
 
 
@@ -443,6 +477,7 @@ def soft_delete_annotation(doc_id: str, page_num: str, ann_id: str, author_id: O
         ann = _annotation_row_to_dict(row)
         _insert_history(conn, doc_id, page_num, ann_id, "delete", ann, author_id)
         conn.commit()
+        _bump_page_generation(doc_id, page_num)
     return True
 
 
@@ -14,40 +14,61 @@ lives (inside the api container), then commit/push the target directory
 """
 
 import argparse
-import json
 import os
 import sys
 import tempfile
 from typing import List, Optional
 
+import config
 import db
 import publisher
+import storage
 
 
-def _write_page(target_dir: str, doc_id: str, page_num: str) -> None:
+def _write_page(target_dir: str, doc_id: str, page_num: str) -> str:
+    """Atomically write one page file; returns the directory it went into."""
     rendered = publisher.render_page(doc_id, page_num)
     out_dir = os.path.join(target_dir, doc_id, "annotations")
     os.makedirs(out_dir, exist_ok=True)
     out_path = os.path.join(out_dir, f"page_{page_num}.json")
 
-    data_bytes = json.dumps(rendered, ensure_ascii=False, indent=2).encode("utf-8")
+    data_bytes = publisher.serialize_page(rendered)
     fd, tmp_path = tempfile.mkstemp(dir=out_dir, prefix="._tmp_", suffix=".json")
     try:
-        with os.fdopen(fd, "wb") as tmp:
-            tmp.write(data_bytes)
-            tmp.flush()
-            os.fsync(tmp.fileno())
-        os.chmod(tmp_path, 0o644)  # mkstemp() defaults to 0600 (owner-only)
+        try:
+            storage.write_all(fd, data_bytes)
+            os.fchmod(fd, 0o644)  # mkstemp() defaults to 0600 (owner-only)
+        finally:
+            os.close(fd)
         os.replace(tmp_path, out_path)
-    finally:
-        if os.path.exists(tmp_path):
+    except BaseException:
+        # Only a failed write leaves the temp file behind.
+        try:
             os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return out_dir
+
+
+def _fsync_dir(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 
 def run(target_dir: str, doc_id: Optional[str] = None) -> int:
     pages = db.list_pages(doc_id)
+    out_dirs = set()
     for d, page_num in pages:
-        _write_page(target_dir, d, page_num)
+        out_dirs.add(_write_page(target_dir, d, page_num))
+    # Each file was fsynced before its rename; one fsync per directory then
+    # makes all of that directory's renames durable.
+    if config.FSYNC_WRITES:
+        for out_dir in sorted(out_dirs):
+            _fsync_dir(out_dir)
     return len(pages)
 
 
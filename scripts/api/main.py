@@ -1,16 +1,22 @@
+import asyncio
+import atexit
 import json
 import logging
+import logging.handlers
+import mmap
+import queue
 import sys
 import time
 import secrets
 from uuid import uuid4
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import Depends, FastAPI, HTTPException, Request, Response
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 import os
 import re
@@ -22,6 +28,10 @@ try:
 except Exception:
     pass
 
+# orjson parses request bodies and renders responses several times faster
+# than the stdlib.
+import orjson
+
 import config
 import db
 import publisher
@@ -39,6 +49,24 @@ def _set_session_cookie(response: Response, session_id: str) -> None:
     )
 
 
+async def _read_json_body(request: Request) -> Any:
+    """Parse a JSON request body. Raises ValueError on malformed JSON.
+
+    orjson is stricter than json.loads (no NaN/Infinity, no integers beyond
+    64 bits), so anything it rejects is retried with the stdlib, which keeps
+    accepting every body the API took before. Such requests are flagged on
+    request.state.json_stdlib so they are also written back out by the stdlib
+    (see storage.serialize_inbox)."""
+    raw = await request.body()
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        pass
+    body = json.loads(raw)
+    request.state.json_stdlib = True
+    return body
+
+
 def verify_google_token(credential: str) -> Dict[str, Any]:
     """Verify a Google ID-token (JWT) and return its claims. Wrapped in its
     own function so tests can monkeypatch it instead of hitting the network."""
@@ -64,13 +92,22 @@ def setup_logger() -> logging.Logger:
         console_handler = logging.StreamHandler(sys.stdout)
         console_fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s", "%Y-%m-%dT%H:%M:%S%z")
         console_handler.setFormatter(console_fmt)
-        logger.addHandler(console_handler)
         
         # File handler (logs/redpen-api.log)
         file_handler = logging.FileHandler(LOG_FILE)
         file_fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s", "%Y-%m-%dT%H:%M:%S%z")
         file_handler.setFormatter(file_fmt)
-        logger.addHandler(file_handler)
+
+        # Handlers write from a listener thread; request handlers only enqueue
+        # the record, so a slow log volume never blocks the event loop.
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        listener = logging.handlers.QueueListener(
+            log_queue, console_handler, file_handler, respect_handler_level=True
+        )
+        listener.start()
+        # Drain whatever is still queued on interpreter exit.
+        atexit.register(listener.stop)
         
         logger.propagate = False
     
@@ -82,7 +119,7 @@ def setup_logger() -> logging.Logger:
 
 logger = setup_logger()
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # CORS configuration
 #
@@ -95,9 +132,13 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=allow_origins,
     allow_credentials=allow_credentials,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Content-Type", "X-CSRF-Token"],
+    allow_methods=config.CORS_ALLOW_METHODS,
+    allow_headers=config.CORS_ALLOW_HEADERS,
+    max_age=config.CORS_MAX_AGE_SECONDS,
 )
+# Page/list responses are repetitive JSON ("annType", "text", "coords" per
+# item) and compress well; tiny ones aren't worth the CPU.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # Setup Jinja2 templates
 TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "templates")
@@ -124,32 +165,14 @@ async def on_startup() -> None:
 
 def parse_log_line(line: str) -> dict:
     """Parse log line into structured data"""
-    try:
-        parts = line.strip().split(" | ")
-        if len(parts) >= 3:
-            return {
-                "timestamp": parts[0],
-                "level": parts[1],
-                "message": " | ".join(parts[2:])
-            }
-        elif len(parts) >= 2:
-            return {
-                "timestamp": parts[0],
-                "level": "INFO",
-                "message": " | ".join(parts[1:])
-            }
-        else:
-            return {
-                "timestamp": "",
-                "level": "UNKNOWN",
-                "message": line.strip()
-            }
-    except Exception:
-        return {
-            "timestamp": "",
-            "level": "ERROR",
-            "message": line.strip()
-        }
+    s = line.strip()
+    timestamp, sep, rest = s.partition(" | ")
+    if not sep:
+        return {"timestamp": "", "level": "UNKNOWN", "message": s}
+    level, sep, message = rest.partition(" | ")
+    if not sep:
+        return {"timestamp": timestamp, "level": "INFO", "message": rest}
+    return {"timestamp": timestamp, "level": level, "message": message}
 
 
 async def require_user(request: Request) -> Dict[str, Any]:
@@ -237,7 +260,7 @@ def _check_optimistic_lock(body: Dict[str, Any], server_sha: str, docId: str, pa
 
     if server_sha and client_sha != server_sha:
         logger.info("docId=%s pageKey=%s: optimistic lock conflict", docId, pageKey)
-        return JSONResponse(status_code=409, content={"detail": "conflict", "serverPageSha": server_sha})
+        return ORJSONResponse(status_code=409, content={"detail": "conflict", "serverPageSha": server_sha})
     return None
 
 
@@ -281,20 +304,49 @@ def _parse_annotation_body(body: Dict[str, Any]) -> Dict[str, Any]:
 
 # ===== LOG VIEWER ENDPOINTS =====
 
+def tail_lines(path: str, n: int) -> List[str]:
+    """Last `n` lines of a UTF-8 text file. The file is mmap'ed and scanned
+    backwards for newlines, so only the returned lines are ever decoded and
+    memory/I/O scale with n rather than with the file size."""
+    if n <= 0:
+        return []
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = len(mm)
+            # A trailing newline terminates the last line; it doesn't start one.
+            pos = end - 1 if mm[end - 1:end] == b"\n" else end
+            for _ in range(n):
+                pos = mm.rfind(b"\n", 0, pos)
+                if pos < 0:
+                    break
+            data = mm[pos + 1:end]
+    return [line.decode("utf-8", errors="replace") for line in data.splitlines(keepends=True)]
+
+
+def _count_lines(path: str, block: int = 1 << 20) -> int:
+    count = 0
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(block), b""):
+            count += chunk.count(b"\n")
+    return count
+
+
+def _read_log_tail(n: int, with_total: bool = False) -> Tuple[List[str], int]:
+    """(last n lines of LOG_FILE, total line count or 0). Blocking: handlers
+    call this via asyncio.to_thread."""
+    if not os.path.exists(LOG_FILE):
+        return [], 0
+    return tail_lines(LOG_FILE, n), (_count_lines(LOG_FILE) if with_total else 0)
+
+
 @app.get("/logs")
 async def logs_page(request: Request, user: Dict[str, str] = Depends(require_admin)):
     """Serve logs viewer page"""
     try:
-        log_file = LOG_FILE
-        logs_data = []
-
-        if os.path.exists(log_file):
-            with open(log_file, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-
-            for line in lines[-500:]:
-                if line.strip():
-                    logs_data.append(parse_log_line(line))
+        lines, _ = await asyncio.to_thread(_read_log_tail, 500)
+        logs_data = [parse_log_line(line) for line in lines if line.strip()]
 
         return templates.TemplateResponse("logs.html", {
             "request": request,
@@ -307,25 +359,20 @@ async def logs_page(request: Request, user: Dict[str, str] = Depends(require_adm
 
 
 @app.get("/api/logs")
-async def get_logs_json(lines: int = 100, user: Dict[str, str] = Depends(require_admin)):
-    """Return logs as JSON"""
+async def get_logs_json(lines: int = 100, count: bool = False, user: Dict[str, str] = Depends(require_admin)):
+    """Return logs as JSON. total_lines needs a scan of the whole log file,
+    so it is only included when asked for with ?count=1."""
     try:
-        log_file = LOG_FILE
-        logs_data = []
+        tail, total_lines = await asyncio.to_thread(_read_log_tail, lines, count)
+        logs_data = [parse_log_line(line) for line in tail if line.strip()]
 
-        if os.path.exists(log_file):
-            with open(log_file, "r", encoding="utf-8") as f:
-                all_lines = f.readlines()
-
-            for line in all_lines[-lines:]:
-                if line.strip():
-                    logs_data.append(parse_log_line(line))
-
-        return {
-            "total_lines": len(all_lines) if os.path.exists(log_file) else 0,
+        result: Dict[str, Any] = {
             "returned_lines": len(logs_data),
             "logs": logs_data
         }
+        if count:
+            result["total_lines"] = total_lines
+        return result
     except Exception as e:
         logger.exception("failed to read log file")
         return {"error": str(e), "logs": []}
@@ -340,7 +387,7 @@ async def health():
 async def login(request: Request, response: Response):
     """Accept personal token and create session"""
     try:
-        body = await request.json()
+        body = await _read_json_body(request)
     except Exception as e:
         logger.error("login: failed to parse JSON body: %s", str(e))
         raise HTTPException(status_code=400, detail="body must be a JSON object")
@@ -409,7 +456,7 @@ async def auth_google(request: Request, response: Response):
         raise HTTPException(status_code=503, detail="google auth is not configured")
 
     try:
-        body = await request.json()
+        body = await _read_json_body(request)
     except Exception:
         raise HTTPException(status_code=400, detail="body must be a JSON object")
 
@@ -458,7 +505,7 @@ async def get_allowlist(user: Dict[str, Any] = Depends(require_admin)):
 @app.post("/api/admin/allowlist")
 async def upsert_allowlist_entry(request: Request, user: Dict[str, Any] = Depends(require_admin_csrf)):
     try:
-        body = await request.json()
+        body = await _read_json_body(request)
     except Exception:
         raise HTTPException(status_code=400, detail="body must be a JSON object")
 
@@ -486,7 +533,7 @@ async def delete_allowlist_entry(email: str, user: Dict[str, Any] = Depends(requ
 @app.post("/api/admin/publish-all")
 async def admin_publish_all(user: Dict[str, Any] = Depends(require_admin_csrf)):
     """Republish every page in the DB to PUBLISH_DIR (volume self-heal / manual repair)."""
-    result = publisher.publish_all()
+    result = await asyncio.to_thread(publisher.publish_all)
     logger.info("admin: publish-all pages=%d failed=%d by=%s", result["pages"], result["failed"], user.get("email"))
     return result
 
@@ -503,7 +550,7 @@ async def hello():
 async def store_raw(request: Request, user: Dict[str, str] = Depends(require_editor)):
     # New endpoint that supports optional bucket/pageId and enhanced response
     try:
-        body_any: Any = await request.json()
+        body_any: Any = await _read_json_body(request)
     except Exception:
         raise HTTPException(status_code=400, detail="body must be a JSON object")
     if not isinstance(body_any, dict):
@@ -541,15 +588,17 @@ async def store_raw(request: Request, user: Dict[str, str] = Depends(require_edi
         "remoteAddr": remote_addr,
     }
 
-    # Precompute size
-    data_str = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
-    data_size = len(data_str.encode("utf-8"))
+    # Serialize once: the same bytes give the size and get written.
+    data_bytes = storage.serialize_inbox(payload, stdlib=getattr(request.state, "json_stdlib", False))
+    data_size = len(data_bytes)
 
     # Generate id and write atomically to final dir
     uid = uuid4().hex
     filename = f"{uid}.json"
     try:
-        rel_path = storage.save_inbox(payload, bucket=bucket, filename=filename)
+        rel_path = await asyncio.to_thread(
+            storage.save_inbox, payload, bucket=bucket, filename=filename, data_bytes=data_bytes
+        )
     except Exception:
         logger.exception("failed to store incoming payload")
         raise HTTPException(status_code=500, detail="failed to store")
@@ -574,7 +623,7 @@ async def store_raw(request: Request, user: Dict[str, str] = Depends(require_edi
 @app.post("/api/store")
 async def store(request: Request, user: Dict[str, str] = Depends(require_editor)):
     try:
-        body: Any = await request.json()
+        body: Any = await _read_json_body(request)
     except Exception:
         # Not a valid JSON
         raise HTTPException(status_code=400, detail="body must be a JSON object")
@@ -597,12 +646,12 @@ async def store(request: Request, user: Dict[str, str] = Depends(require_editor)
         "remoteAddr": remote_addr,
     }
 
-    # Precompute size using same serialization options as storage
-    data_str = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
-    data_size = len(data_str.encode("utf-8"))
+    # Serialize once: the same bytes give the size and get written.
+    data_bytes = storage.serialize_inbox(payload, stdlib=getattr(request.state, "json_stdlib", False))
+    data_size = len(data_bytes)
 
     try:
-        rel_path = storage.save_inbox(payload)
+        rel_path = await asyncio.to_thread(storage.save_inbox, payload, data_bytes=data_bytes)
     except Exception:
         logger.exception("failed to store incoming payload")
         raise HTTPException(status_code=500, detail="failed to store")
@@ -610,8 +659,25 @@ async def store(request: Request, user: Dict[str, str] = Depends(require_editor)
     logger.info("stored file=%s size=%d", rel_path, data_size)
     return {"status": "stored", "path": rel_path}
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check with weak comparison (RFC 9110 13.1.2): the header
+    may list several tags or be "*", and W/ prefixes are ignored on both sides."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
 @app.get("/api/pages/{pageId}")
-async def get_page(pageId: str):
+async def get_page(pageId: str, request: Request):
     """GET page data by pageId (legacy endpoint, for backwards compatibility).
     Rendered from the SQLite annotations store (stage 2); imageUrl/origW/origH
     were never populated by this endpoint and remain placeholders."""
@@ -624,23 +690,36 @@ async def get_page(pageId: str):
     page_num = _validate_page_key(page_num_raw)
     if page_num is None:
         raise HTTPException(status_code=400, detail="invalid pageId format")
-    rendered = publisher.render_page(doc_id, page_num)
-    sha = publisher.compute_page_sha(rendered)
+    rendered, sha = publisher.render_page_with_sha(doc_id, page_num)
+    # serverPageSha is a content hash of the page, so it doubles as the ETag:
+    # a client revalidating an unchanged page gets a bodyless 304. Weak,
+    # because GZipMiddleware may send the same entity gzip- or identity-encoded.
+    etag = f'W/"{sha}"'
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        logger.info("GET pageId=%s not modified", pageId)
+        return Response(status_code=304, headers={"ETag": etag})
 
     logger.info("GET pageId=%s anns=%d", pageId, len(rendered))
-    return {
-        "pageId": pageId,
-        "imageUrl": "",
-        "origW": 0,
-        "origH": 0,
-        "serverPageSha": sha,
-        "annotations": rendered,
-    }
+    return ORJSONResponse(
+        {
+            "pageId": pageId,
+            "imageUrl": "",
+            "origW": 0,
+            "origH": 0,
+            "serverPageSha": sha,
+            "annotations": rendered,
+        },
+        headers={"ETag": etag},
+    )
+
+
+DOC_ID_RE = re.compile(r"[a-z0-9_-]+")
+PAGE_KEY_RE = re.compile(r"-?\d{1,3}")
 
 
 def _validate_doc_id(doc_id: str) -> bool:
     """Validate docId: alphanumeric, underscore, hyphen"""
-    return bool(re.fullmatch(r"[a-z0-9_-]+", doc_id or ""))
+    return bool(DOC_ID_RE.fullmatch(doc_id or ""))
 
 
 def _validate_page_key(key: str) -> Optional[str]:
@@ -652,7 +731,7 @@ def _validate_page_key(key: str) -> Optional[str]:
     zfill(2) of the absolute value ("-1"/"-01" -> "-01"). Invalid input
     (wrong shape, out of range) -> None, caller responds 400.
     """
-    if not isinstance(key, str) or not re.fullmatch(r"-?\d{1,3}", key):
+    if not isinstance(key, str) or not PAGE_KEY_RE.fullmatch(key):
         return None
     n = int(key)
     return f"-{abs(n):02d}" if n < 0 else f"{n:03d}"
@@ -661,7 +740,7 @@ def _validate_page_key(key: str) -> Optional[str]:
 # ===== NEW ENDPOINTS =====
 
 def _current_page_sha(docId: str, page_num_str: str) -> str:
-    return publisher.compute_page_sha(publisher.render_page(docId, page_num_str))
+    return publisher.render_page_with_sha(docId, page_num_str)[1]
 
 
 def _resolve_status(parsed: Dict[str, Any], existing: Optional[Dict[str, Any]]) -> str:
@@ -687,8 +766,7 @@ async def get_editor_page(docId: str, pageNum: str, user: Optional[Dict[str, Any
     if page_num_str is None:
         raise HTTPException(status_code=400, detail="invalid pageNum")
 
-    rendered = publisher.render_page(docId, page_num_str)
-    sha = publisher.compute_page_sha(rendered)
+    rendered, sha = publisher.render_page_with_sha(docId, page_num_str)
     annotations = list(rendered)
 
     if user is not None and user.get("role") in ("editor", "admin"):
@@ -699,11 +777,13 @@ async def get_editor_page(docId: str, pageNum: str, user: Optional[Dict[str, Any
             annotations.append(item)
 
     logger.info("GET editor docId=%s pageKey=%s anns=%d", docId, page_num_str, len(annotations))
-    return {
+    # Returning the response object directly skips FastAPI's jsonable_encoder
+    # pass over every annotation; the content is already plain JSON types.
+    return ORJSONResponse({
         "pageId": f"{docId}_page_{page_num_str}",
         "serverPageSha": sha,
         "annotations": annotations,
-    }
+    })
 
 
 @app.post("/api/editor/{docId}/{pageNum}")
@@ -716,7 +796,7 @@ async def post_editor_annotation(docId: str, pageNum: str, request: Request, use
         raise HTTPException(status_code=400, detail="invalid pageNum")
 
     try:
-        body = await request.json()
+        body = await _read_json_body(request)
     except Exception:
         raise HTTPException(status_code=400, detail="body must be a JSON object")
 
@@ -740,7 +820,9 @@ async def post_editor_annotation(docId: str, pageNum: str, request: Request, use
         docId, page_num_str, ann["id"], ann["annType"], ann["text"],
         coord_x=coord_x, coord_y=coord_y, status=status, author_id=user["userId"], action=action,
     )
-    write_ok = publisher.publish_page(docId, page_num_str)
+    # publish_page renders and writes files on the volume; run it on a worker
+    # thread so a slow disk doesn't stall every other request on the loop.
+    write_ok = await asyncio.to_thread(publisher.publish_page, docId, page_num_str)
     published = write_ok and status == "published"
     new_sha = _current_page_sha(docId, page_num_str)
 
@@ -761,7 +843,7 @@ async def put_editor_annotation(docId: str, pageNum: str, annId: str, request: R
         raise HTTPException(status_code=400, detail="invalid pageNum")
 
     try:
-        body = await request.json()
+        body = await _read_json_body(request)
     except Exception:
         raise HTTPException(status_code=400, detail="body must be a JSON object")
 
@@ -784,7 +866,7 @@ async def put_editor_annotation(docId: str, pageNum: str, annId: str, request: R
         docId, page_num_str, annId, parsed["annType"], parsed["text"],
         coord_x=coord_x, coord_y=coord_y, status=status, author_id=user["userId"], action=action,
     )
-    write_ok = publisher.publish_page(docId, page_num_str)
+    write_ok = await asyncio.to_thread(publisher.publish_page, docId, page_num_str)
     published = write_ok and status == "published"
     new_sha = _current_page_sha(docId, page_num_str)
 
@@ -808,7 +890,7 @@ async def delete_editor_annotation(docId: str, pageNum: str, annId: str, user: D
     if not deleted:
         raise HTTPException(status_code=404, detail="annotation not found")
 
-    published = publisher.publish_page(docId, page_num_str)
+    published = await asyncio.to_thread(publisher.publish_page, docId, page_num_str)
     new_sha = _current_page_sha(docId, page_num_str)
 
     logger.info(
@@ -876,7 +958,7 @@ async def list_annotations(
         doc_id=docId, page_num=validated["pageKey"], ann_type=annType, status=status,
         author_id=authorId, q=q,
     )
-    return {"items": items, "total": total, "limit": limit, "offset": offset}
+    return ORJSONResponse({"items": items, "total": total, "limit": limit, "offset": offset})
 
 
 @app.get("/api/history")
@@ -895,7 +977,7 @@ async def list_history(
         doc_id=docId, page_num=validated["pageKey"], ann_id=annId, author_id=authorId,
         action=action, limit=limit, offset=offset,
     )
-    return {"items": items, "hasMore": len(items) == limit, "limit": limit, "offset": offset}
+    return ORJSONResponse({"items": items, "hasMore": len(items) == limit, "limit": limit, "offset": offset})
 
 
 @app.get("/api/stats")
@@ -926,7 +1008,7 @@ async def revert_history(histId: int, user: Dict[str, Any] = Depends(require_edi
         coord_x=coords[0] if coords else None, coord_y=coords[1] if coords else None,
         status=snapshot.get("status", "published"), author_id=user["userId"], action="revert",
     )
-    published = publisher.publish_page(doc_id, page_num)
+    published = await asyncio.to_thread(publisher.publish_page, doc_id, page_num)
     new_sha = _current_page_sha(doc_id, page_num)
 
     logger.info(
@@ -946,4 +1028,11 @@ async def get_admin_users(user: Dict[str, Any] = Depends(require_admin)):
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("main:app", host="0.0.0.0", port=8080, reload=False, workers=1, proxy_headers=True)
+    # Exactly one worker: sessions, the page/sha cache, publish coalescing and
+    # the SQLite connection are all per-process (see db.py). uvloop/httptools
+    # come with uvicorn[standard]; name them so a missing one fails loudly
+    # instead of silently falling back to asyncio/h11.
+    uvicorn.run(
+        "main:app", host="0.0.0.0", port=8080, reload=False, workers=1, proxy_headers=True,
+        loop="uvloop", http="httptools",
+    )
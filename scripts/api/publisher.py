@@ -7,19 +7,44 @@ used as serverPageSha for optimistic locking.
 PUBLISH_DIR is empty by default (publication disabled) -- see config.py.
 """
 
+import functools
 import hashlib
-import json
 import logging
 import os
 import tempfile
-from typing import Any, Dict, List
+import threading
+from typing import Any, Dict, List, Set, Tuple
 
 import config
 import db
+import storage
+
+# orjson is several times faster than json.dumps. For what pages contain
+# (strings, integer coords, booleans) it writes the same bytes as the json.dumps
+# calls it replaced, so published files and page SHAs didn't change; that is
+# pinned in tests/test_publisher.py. Floats would differ (1e16 vs 1e+16).
+import orjson
+
+# blake3 is optional; only used when config.PAGE_SHA_ALGO == "blake3".
+try:
+    from blake3 import blake3  # type: ignore
+except ImportError:  # pragma: no cover - exercised only with blake3 installed
+    blake3 = None
 
 logger = logging.getLogger("redpen.api")
 
-_SHA_JSON_KWARGS = dict(ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+# main.py runs publish_page() on worker threads (asyncio.to_thread). Render and
+# write under one lock so a thread that rendered an older DB state can't
+# replace the file after a newer render has already landed.
+_publish_lock = threading.Lock()
+# (PUBLISH_DIR, doc_id, page_num) -> db.page_generation() last written to PUBLISH_DIR. Under
+# a burst of edits to one page, requests queue on _publish_lock; whichever
+# gets it first writes the newest state and the rest find nothing to do,
+# so N edits cost one write, not N.
+_published_generations: Dict[Tuple[str, str, str], Tuple[int, int, int]] = {}
+# Annotation directories already created, so writes skip the makedirs() call.
+_ensured_dirs: Set[str] = set()
 
 
 def render_page(doc_id: str, page_num: str) -> List[Dict[str, Any]]:
@@ -59,8 +84,28 @@ def render_drafts(doc_id: str, page_num: str) -> List[Dict[str, Any]]:
 
 
 def compute_page_sha(rendered: List[Dict[str, Any]]) -> str:
-    payload = json.dumps(rendered, **_SHA_JSON_KWARGS)
-    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    # Same bytes as json.dumps(ensure_ascii=False, separators=(",", ":"),
+    # sort_keys=True) for page content (see the orjson note above).
+    payload = orjson.dumps(rendered, option=orjson.OPT_SORT_KEYS)
+    if config.PAGE_SHA_ALGO == "blake3" and blake3 is not None:
+        return blake3(payload).hexdigest()
+    if config.PAGE_SHA_ALGO == "blake2b":
+        # 32-byte digest: same 64-hex-char length as sha256.
+        return hashlib.blake2b(payload, digest_size=32).hexdigest()
+    return hashlib.sha256(payload).hexdigest()
+
+
+@functools.lru_cache(maxsize=1024)
+def _render_page_cached(doc_id: str, page_num: str, generation: Tuple[int, int, int]) -> Tuple[List[Dict[str, Any]], str]:
+    rendered = render_page(doc_id, page_num)
+    return rendered, compute_page_sha(rendered)
+
+
+def render_page_with_sha(doc_id: str, page_num: str) -> Tuple[List[Dict[str, Any]], str]:
+    """render_page() plus its compute_page_sha(), cached per page until the
+    next annotation write to it (db.page_generation). The returned list is
+    shared between callers -- copy it before mutating."""
+    return _render_page_cached(doc_id, page_num, db.page_generation(doc_id, page_num))
 
 
 def _page_file_path(doc_id: str, page_num: str) -> str:
@@ -71,46 +116,77 @@ def _drafts_file_path(doc_id: str, page_num: str) -> str:
     return os.path.join(config.PUBLISH_DIR, doc_id, "annotations", f"page_{page_num}.drafts.json")
 
 
+def serialize_page(rendered: List[Dict[str, Any]], pretty: bool = True) -> bytes:
+    """UTF-8 JSON bytes of a rendered page: 2-space indented (the git export
+    format, and what the API publishes unless PUBLISH_PRETTY_JSON is off) or,
+    with pretty=False, compact -- the viewer doesn't care and the files are
+    2-3x smaller."""
+    return orjson.dumps(rendered, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+
 def _atomic_write_json(target: str, rendered: List[Dict[str, Any]]) -> None:
-    """Atomically write `rendered` as pretty JSON to `target`, world-readable."""
+    """Atomically write `rendered` as JSON to `target`, world-readable."""
     target_dir = os.path.dirname(target)
-    os.makedirs(target_dir, exist_ok=True)
-    data_bytes = json.dumps(rendered, ensure_ascii=False, indent=2).encode("utf-8")
-    fd, tmp_path = tempfile.mkstemp(dir=target_dir, prefix="._tmp_", suffix=".json")
+    if target_dir not in _ensured_dirs:
+        os.makedirs(target_dir, exist_ok=True)
+        _ensured_dirs.add(target_dir)
+    data_bytes = serialize_page(rendered, pretty=config.PUBLISH_PRETTY_JSON)
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=target_dir, prefix="._tmp_", suffix=".json")
+    except FileNotFoundError:
+        # The directory was removed behind our back (e.g. the volume was wiped).
+        os.makedirs(target_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=target_dir, prefix="._tmp_", suffix=".json")
     try:
-        with os.fdopen(fd, "wb") as tmp:
-            tmp.write(data_bytes)
-            tmp.flush()
-            os.fsync(tmp.fileno())
-        # mkstemp() creates the file mode 0600 (owner-only); this directory
-        # is served directly by nginx (a different uid), so it must be
-        # world-readable like a normal checked-out file.
-        os.chmod(tmp_path, 0o644)
+        try:
+            storage.write_all(fd, data_bytes)
+            # mkstemp() creates the file mode 0600 (owner-only); this directory
+            # is served directly by nginx (a different uid), so it must be
+            # world-readable like a normal checked-out file.
+            os.fchmod(fd, 0o644)
+        finally:
+            os.close(fd)
         os.replace(tmp_path, target)
-    finally:
-        if os.path.exists(tmp_path):
+    except BaseException:
+        # Only a failed write leaves the temp file behind.
+        try:
             os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
 
 
-def publish_page(doc_id: str, page_num: str) -> bool:
+def publish_page(doc_id: str, page_num: str, force: bool = False) -> bool:
     """Atomically write the rendered bare array for a page to PUBLISH_DIR, plus
     a sibling page_<NNN>.drafts.json for the ?showDrafts=1 preview mode. Returns
     False (without raising) if publication is disabled or fails -- the DB write
-    already succeeded, and the volume can be repaired later via publish_all()."""
+    already succeeded, and the volume can be repaired later via publish_all().
+    Skips the write if the page hasn't changed since it was last published,
+    unless `force` is set."""
     if not config.PUBLISH_DIR:
         return False
 
+    key = (config.PUBLISH_DIR, doc_id, page_num)
     try:
-        _atomic_write_json(_page_file_path(doc_id, page_num), render_page(doc_id, page_num))
-
-        drafts = render_drafts(doc_id, page_num)
-        drafts_target = _drafts_file_path(doc_id, page_num)
-        if drafts:
-            _atomic_write_json(drafts_target, drafts)
-        elif os.path.exists(drafts_target):
-            # No drafts remain (all published/deleted): drop any stale file so
-            # the preview mode doesn't keep showing gone drafts.
-            os.remove(drafts_target)
+        with _publish_lock:
+            # Read before rendering: the render is then at least this fresh.
+            generation = db.page_generation(doc_id, page_num)
+            if not force and _published_generations.get(key) == generation:
+                return True
+            # Render through the cache: the caller's follow-up serverPageSha
+            # lookup then hits it instead of rendering and hashing again.
+            rendered, _ = render_page_with_sha(doc_id, page_num)
+            _atomic_write_json(_page_file_path(doc_id, page_num), rendered)
+
+            drafts = render_drafts(doc_id, page_num)
+            drafts_target = _drafts_file_path(doc_id, page_num)
+            if drafts:
+                _atomic_write_json(drafts_target, drafts)
+            elif os.path.exists(drafts_target):
+                # No drafts remain (all published/deleted): drop any stale file so
+                # the preview mode doesn't keep showing gone drafts.
+                os.remove(drafts_target)
+            _published_generations[key] = generation
     except Exception:
         logger.error("publish_page failed doc_id=%s page_num=%s", doc_id, page_num, exc_info=True)
         return False
@@ -123,6 +199,6 @@ def publish_all() -> Dict[str, int]:
     pages = db.list_pages()
     failed = 0
     for doc_id, page_num in pages:
-        if not publish_page(doc_id, page_num):
+        if not publish_page(doc_id, page_num, force=True):
             failed += 1
     return {"pages": len(pages), "failed": failed}
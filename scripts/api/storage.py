@@ -1,15 +1,25 @@
 import json
 import os
+import re
 import tempfile
+import time
 import uuid
-from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Optional, Tuple
+
+# For strings, integers, booleans, null and containers of them, OPT_SORT_KEYS
+# output matches json.dumps(**essential_json_kwargs).encode("utf-8") byte for
+# byte. Floats in exponent form don't: orjson writes 1e16 and 1e-7 where
+# json.dumps writes 1e+16 and 1e-07.
+import orjson
 
 import config
 
 # Storage base directory (constant from config)
 STORAGE_BASE_DIR = config.STORAGE_DIR
 
+_DISALLOWED_BUCKET_CHARS_RE = re.compile(r"[^a-z0-9/_-]")
+_MULTI_SLASH_RE = re.compile(r"/{2,}")
+
 
 def sanitize_bucket(candidate: str, for_page_id: bool = False, max_len: int = 120, max_depth: int = 3) -> str:
     """Sanitize bucket name or derived value from pageId.
@@ -36,11 +46,9 @@ def sanitize_bucket(candidate: str, for_page_id: bool = False, max_len: int = 12
     if for_page_id:
         s = s.replace(":", "-").replace(".", "-")
     # replace disallowed chars
-    allowed = set("abcdefghijklmnopqrstuvwxyz0123456789/_-")
-    s = "".join(ch if ch in allowed else "-" for ch in s)
+    s = _DISALLOWED_BUCKET_CHARS_RE.sub("-", s)
     # collapse multiple slashes
-    while "//" in s:
-        s = s.replace("//", "/")
+    s = _MULTI_SLASH_RE.sub("/", s)
     # strip leading/trailing slashes
     s = s.strip("/")
     # enforce max depth
@@ -57,57 +65,135 @@ def sanitize_bucket(candidate: str, for_page_id: bool = False, max_len: int = 12
         s = s[:max_len]
     s = s.strip("-/")
     # collapse any accidental repeats again
-    while "//" in s:
-        s = s.replace("//", "/")
+    s = _MULTI_SLASH_RE.sub("/", s)
     return s
 
+# (epoch day, "YYYYMMDD") -- the date string only changes once a day.
+_today_cache: Tuple[int, str] = (-1, "")
+
+
+def _utc_today() -> str:
+    global _today_cache
+    now = time.time()
+    epoch_day = int(now // 86400)
+    if epoch_day != _today_cache[0]:
+        _today_cache = (epoch_day, time.strftime("%Y%m%d", time.gmtime(now)))
+    return _today_cache[1]
+
+
 def get_inbox_dir() -> str:
     """Return absolute path to STORAGE_BASE_DIR/inbox/YYYYMMDD (UTC)."""
-    today = datetime.utcnow().strftime("%Y%m%d")
-    return os.path.join(STORAGE_BASE_DIR, "inbox", today)
+    return os.path.join(STORAGE_BASE_DIR, "inbox", _utc_today())
 
 
 essential_json_kwargs = dict(ensure_ascii=False, separators=(",", ":"), sort_keys=True)
 
 
-def save_inbox(obj: Any, bucket: Optional[str] = None, filename: Optional[str] = None) -> str:
+def serialize_inbox(obj: Any, stdlib: bool = False) -> bytes:
+    """Compact, key-sorted UTF-8 JSON bytes, exactly as save_inbox() writes them.
+
+    Pass stdlib=True for objects that only json.loads could parse: orjson would
+    write NaN/Infinity as null, so those go through json.dumps unchanged."""
+    if not stdlib:
+        try:
+            # OPT_NON_STR_KEYS: accept int/etc. keys (stringified) like json.dumps does.
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass  # e.g. an integer beyond 64 bits
+    return json.dumps(obj, **essential_json_kwargs).encode("utf-8")
+
+
+def save_inbox(
+    obj: Any,
+    bucket: Optional[str] = None,
+    filename: Optional[str] = None,
+    data_bytes: Optional[bytes] = None,
+) -> str:
     """
     Save given Python object as JSON into STORAGE_BASE_DIR/inbox/YYYYMMDD[/bucket]/<uuid>.json atomically.
+    Pass data_bytes (serialize_inbox(obj)) if the caller already serialized obj.
     Returns the relative path like: inbox/YYYYMMDD[/bucket]/<uuid>.json
     """
-    inbox_abs = get_inbox_dir()
+    # Resolve the day once: the directory written to and the returned relative
+    # path must agree even if the write straddles UTC midnight.
+    day_dir = get_inbox_dir()
+    inbox_abs = day_dir
     if bucket:
         inbox_abs = os.path.join(inbox_abs, bucket)
     os.makedirs(inbox_abs, exist_ok=True)
 
-    filename = filename or f"{uuid.uuid4()}.json"
+    filename = filename or (uuid.uuid4().hex + ".json")
     abs_path = os.path.join(inbox_abs, filename)
 
-    # Serialize per spec
-    data_str = json.dumps(obj, **essential_json_kwargs)
-    data_bytes = data_str.encode("utf-8")
+    if data_bytes is None:
+        data_bytes = serialize_inbox(obj)
+
+    if _write_new_file_tmpfile(inbox_abs, abs_path, data_bytes):
+        return _inbox_rel_path(day_dir, bucket, filename)
 
     # Atomic write: write to temp file then replace
     fd, tmp_path = tempfile.mkstemp(dir=inbox_abs, prefix="._tmp_", suffix=".json")
     try:
-        with os.fdopen(fd, "wb") as tmp:
-            tmp.write(data_bytes)
-            tmp.flush()
-            os.fsync(tmp.fileno())
-        os.chmod(tmp_path, 0o644)  # mkstemp() defaults to 0600 (owner-only)
+        try:
+            write_all(fd, data_bytes)
+            os.fchmod(fd, 0o644)  # mkstemp() defaults to 0600 (owner-only)
+        finally:
+            os.close(fd)
         os.replace(tmp_path, abs_path)
-    finally:
+    except BaseException:
+        # Only a failed write leaves the temp file behind; a successful
+        # os.replace() consumed it, so don't stat() for it on every save.
         try:
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
-        except Exception:
+            os.remove(tmp_path)
+        except OSError:
             pass
+        raise
 
-    # Return relative path
-    today = os.path.basename(get_inbox_dir())
-    parts = ["inbox", today]
+    return _inbox_rel_path(day_dir, bucket, filename)
+
+
+def _inbox_rel_path(day_dir: str, bucket: Optional[str], filename: str) -> str:
+    parts = ["inbox", os.path.basename(day_dir)]
     if bucket:
         parts.append(bucket)
     parts.append(filename)
-    rel_path = os.path.join(*parts)
-    return rel_path
+    return os.path.join(*parts)
+
+
+def write_all(fd: int, data_bytes: bytes) -> None:
+    """Write the whole buffer to ``fd`` (retrying short writes), then fsync
+    it when FSYNC_WRITES is on. Shared by the publisher and export writers."""
+    # The payload is already one buffer; a BufferedWriter would only add a copy.
+    view = memoryview(data_bytes)
+    while view:
+        view = view[os.write(fd, view):]
+    if config.FSYNC_WRITES:
+        os.fsync(fd)
+
+
+_O_TMPFILE = getattr(os, "O_TMPFILE", None)
+
+
+def _write_new_file_tmpfile(dir_path: str, target: str, data_bytes: bytes) -> bool:
+    """Linux fast path for creating a *new* file atomically: write an unnamed
+    O_TMPFILE inode, then linkat() it into place -- no temp name, no rename,
+    nothing to clean up if we crash halfway. linkat() can't replace an
+    existing file, so this returns False (having written nothing visible)
+    when the target exists, or O_TMPFILE / /proc aren't available; the
+    caller then falls back to mkstemp + os.replace."""
+    if _O_TMPFILE is None:
+        return False
+    try:
+        fd = os.open(dir_path, _O_TMPFILE | os.O_WRONLY, 0o644)
+    except OSError:  # filesystem doesn't support O_TMPFILE
+        return False
+    try:
+        write_all(fd, data_bytes)
+        os.fchmod(fd, 0o644)  # don't depend on the process umask
+        try:
+            os.link(f"/proc/self/fd/{fd}", target, follow_symlinks=True)
+        except OSError:
+            return False
+    finally:
+        os.close(fd)
+    return True
@@ -24,11 +24,15 @@ Options:
 import os
 import sys
 import argparse
+import shlex
 import subprocess
-import importlib.util
+import importlib
 import shutil
-import glob
 import datetime
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+PUBLISH_COMMIT_MESSAGE = "Update website content via build script"
 
 # ===== Helper functions for backup/clean/compare of publish directory =====
 
@@ -112,10 +116,17 @@ def compare_path_sets(before_paths, after_paths):
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(project_root)
 
+DOCUMENT_SUBDIRS = frozenset(['images', 'text', 'annotations'])
+
+
 def get_document_folders(specific_folders=None):
     """
     Get a list of document folders from redpen-content directory.
 
+    The scan is cached per content directory for the life of the process (every
+    build phase asks for the same list); _scan_document_folders.cache_clear()
+    forces a rescan.
+
     Args:
         specific_folders (list): Optional list of specific folders to include.
                                 If provided, only these folders will be returned if they exist.
@@ -124,7 +135,11 @@ def get_document_folders(specific_folders=None):
         list: List of document folder names
     """
     content_dir = os.path.join(project_root, 'redpen-content')
+    return list(_scan_document_folders(content_dir, tuple(specific_folders or ())))
 
+
+@functools.lru_cache(maxsize=None)
+def _scan_document_folders(content_dir, specific_folders):
     # If specific folders are provided, filter by them
     if specific_folders:
         folders = []
@@ -134,50 +149,56 @@ def get_document_folders(specific_folders=None):
                 folders.append(folder)
             else:
                 print(f"Warning: Specified folder '{folder}' not found in redpen-content")
-        return folders
+        return tuple(folders)
 
-    # Otherwise, get all folders in the content directory
+    # Otherwise, get all folders in the content directory: one scandir of the
+    # content dir, plus one per candidate to look for its data subdirectories.
     folders = []
-    for item in glob.glob(os.path.join(content_dir, '*')):
-        if os.path.isdir(item):
-            folder_name = os.path.basename(item)
-            # Check if this is a valid document folder (has images, text, or annotations subdirectory)
-            if any(os.path.isdir(os.path.join(item, subdir)) for subdir in ['images', 'text', 'annotations']):
-                folders.append(folder_name)
+    try:
+        entries = list(os.scandir(content_dir))
+    except OSError:
+        entries = []
+    for entry in entries:
+        if entry.name.startswith('.') or not entry.is_dir():
+            continue
+        # Check if this is a valid document folder (has images, text, or annotations subdirectory)
+        try:
+            with os.scandir(entry.path) as children:
+                if any(child.name in DOCUMENT_SUBDIRS and child.is_dir() for child in children):
+                    folders.append(entry.name)
+        except OSError:
+            continue
 
     if not folders:
         print("Warning: No document folders found in redpen-content directory")
 
-    return folders
-
-# Import required modules
-def import_module_from_file(module_name, file_path):
-    """Import a module from a file path"""
-    spec = importlib.util.spec_from_file_location(module_name, file_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
-
-# Import the annotation converter and publish_data modules
-annotation_converter = import_module_from_file(
-    'annotation_converter', 
-    os.path.join(project_root, 'scripts', 'annotation_converter.py')
-)
-publish_data = import_module_from_file(
-    'publish_data',
-    os.path.join(project_root, 'scripts', 'publish_data.py')
-)
-generate_page_manifest = import_module_from_file(
-    'generate_page_manifest',
-    os.path.join(project_root, 'scripts', 'generate_page_manifest.py')
-)
+    return tuple(folders)
+
+# Sibling modules in scripts/ are imported normally (so their __pycache__
+# bytecode is reused). That directory is already sys.path[0] when this file
+# runs as a script; add it for callers that load build_website by path.
+scripts_dir = os.path.dirname(os.path.abspath(__file__))
+if scripts_dir not in sys.path:
+    sys.path.insert(0, scripts_dir)
+
+import annotation_converter  # noqa: E402
+import generate_page_manifest  # noqa: E402
+import publish_data  # noqa: E402
+
+
+def import_test_module(module_name):
+    """Import a browser-test helper module from tests/ (not a package)."""
+    tests_dir = os.path.join(project_root, 'tests')
+    if tests_dir not in sys.path:
+        sys.path.insert(0, tests_dir)
+    return importlib.import_module(module_name)
 
 def run_command(command, cwd=None):
-    """Run a shell command and return the result"""
-    print(f"Running command: {command}")
+    """Run a command (argv list, or a string split shell-style) without a shell"""
+    args = shlex.split(command) if isinstance(command, str) else list(command)
+    print(f"Running command: {shlex.join(args)}")
     result = subprocess.run(
-        command, 
-        shell=True, 
+        args,
         cwd=cwd or project_root,
         capture_output=True,
         text=True
@@ -280,109 +301,15 @@ def run_annotation_tests(target_dir=None):
     print("\n=== Running Annotation Position Tests ===")
 
     # Import the annotation_position_tests module
-    tests_module = import_module_from_file(
-        'annotation_position_tests',
-        os.path.join(project_root, 'tests', 'annotation_position_tests.py')
-    )
+    tests_module = import_test_module('annotation_position_tests')
 
     # Create test files in the target directory
     print("\n=== Creating Test Files for Annotation Tests ===")
     tests_module.create_test_files(target_dir or os.path.join(project_root, 'redpen-publish'))
 
     try:
-        # Run the tests with a custom function that captures the result
-        class TestResult:
-            def __init__(self):
-                self.all_pass = None
-
-        result = TestResult()
-
-        # Monkey patch the run_tests function to capture the result
-        original_run_tests = tests_module.run_tests
-
-        def patched_run_tests(update_baseline=False):
-            # Load baseline positions
-            baseline = tests_module.load_baseline_positions()
-
-            # Get the base path and publish directory
-            base_path = os.path.abspath(os.path.join(os.path.dirname(tests_module.__file__), '..'))
-
-            # Use target_dir if provided, otherwise use default redpen-publish
-            if target_dir:
-                publish_dir = target_dir
-            else:
-                publish_dir = os.path.join(base_path, 'redpen-publish')
-
-            # Save current directory to restore it later
-            original_dir = os.getcwd()
-
-            # Start a local HTTP server
-            port = tests_module.find_free_port()
-            print(f"Starting HTTP server on port {port}...")
-            server = tests_module.start_http_server(publish_dir, port)
-
-            try:
-                with tests_module.sync_playwright() as p:
-                    # Test 1: Desktop width (1280px)
-                    print("\n=== Test 1: Desktop Width (1280px) ===")
-                    desktop_results = tests_module.test_desktop_width(p, port)
-
-                    # Test 2: Mobile width (800px)
-                    print("\n=== Test 2: Mobile Width (800px) ===")
-                    mobile_results = tests_module.test_mobile_width(p, port)
-
-                    # Test 3: Resize from desktop to mobile
-                    print("\n=== Test 3: Resize from Desktop to Mobile ===")
-                    desktop_to_mobile_results = tests_module.test_resize_desktop_to_mobile(p, port)
-
-                    # Test 4: Resize from mobile to desktop
-                    print("\n=== Test 4: Resize from Mobile to Desktop ===")
-                    mobile_to_desktop_results = tests_module.test_resize_mobile_to_desktop(p, port)
-
-                    # Update baseline if requested
-                    if update_baseline:
-                        baseline = {
-                            'desktop': desktop_results,
-                            'mobile': mobile_results,
-                            'desktop_to_mobile': desktop_to_mobile_results,
-                            'mobile_to_desktop': mobile_to_desktop_results
-                        }
-                        tests_module.save_baseline_positions(baseline)
-                        print("\nBaseline positions updated")
-                    else:
-                        # Compare with baseline
-                        print("\n=== Comparing with Baseline ===")
-                        desktop_match = tests_module.compare_positions(desktop_results, baseline.get('desktop', []))
-                        mobile_match = tests_module.compare_positions(mobile_results, baseline.get('mobile', []))
-                        desktop_to_mobile_match = tests_module.compare_positions(desktop_to_mobile_results, baseline.get('desktop_to_mobile', []))
-                        mobile_to_desktop_match = tests_module.compare_positions(mobile_to_desktop_results, baseline.get('mobile_to_desktop', []))
-
-                        # Print overall results
-                        print("\n=== Overall Results ===")
-                        print(f"Desktop width test: {'PASS' if desktop_match else 'FAIL'}")
-                        print(f"Mobile width test: {'PASS' if mobile_match else 'FAIL'}")
-                        print(f"Desktop to mobile resize test: {'PASS' if desktop_to_mobile_match else 'FAIL'}")
-                        print(f"Mobile to desktop resize test: {'PASS' if mobile_to_desktop_match else 'FAIL'}")
-
-                        result.all_pass = desktop_match and mobile_match and desktop_to_mobile_match and mobile_to_desktop_match
-                        print(f"\nOverall: {'PASS' if result.all_pass else 'FAIL'}")
-            finally:
-                # Restore original directory
-                os.chdir(original_dir)
-
-                # Shutdown the server
-                server.shutdown()
-
-        # Replace the original function with our patched version
-        tests_module.run_tests = patched_run_tests
-
-        # Run the tests
-        tests_module.run_tests(update_baseline=False)
-
-        # Restore the original function
-        tests_module.run_tests = original_run_tests
-
-        return result.all_pass
+        publish_dir = target_dir or os.path.join(project_root, 'redpen-publish')
+        return tests_module.run_position_tests(publish_dir)
     except Exception as e:
         print(f"Error running annotation tests: {e}")
         return False
@@ -391,10 +318,7 @@ def run_editor_mode_tests(target_dir=None):
     """Run editor mode visibility tests (presence of panel when ?editor=1)."""
     print("\n=== Running Editor Mode Visibility Tests ===")
     try:
-        tests_module = import_module_from_file(
-            'editor_mode_tests',
-            os.path.join(project_root, 'tests', 'editor_mode_tests.py')
-        )
+        tests_module = import_test_module('editor_mode_tests')
         result = tests_module.run_tests(target_dir)
         print(f"Editor mode tests: {'PASS' if result else 'FAIL'}")
         return bool(result)
@@ -402,6 +326,175 @@ def run_editor_mode_tests(target_dir=None):
         print(f"Error running editor mode tests: {e}")
         return False
 
+# (subdirectory of templates/ and of the output dir, suffixes to copy). "" is
+# the templates root itself (favicon). cabinet/ is the stage 3 cabinet page.
+TEMPLATE_COPY_RULES = [
+    ('css', ('.css',)),
+    ('js', ('.js',)),
+    ('', ('.svg',)),
+    ('cabinet', ('.html', '.js', '.css')),
+]
+
+
+def copy_template_files(templates_dir, output_dir):
+    """Copy static template assets into output_dir: one directory scan per
+    TEMPLATE_COPY_RULES entry instead of a glob per suffix."""
+    for subdir, suffixes in TEMPLATE_COPY_RULES:
+        src_dir = os.path.join(templates_dir, subdir)
+        if not os.path.isdir(src_dir):
+            continue
+        dest_dir = os.path.join(output_dir, subdir)
+        os.makedirs(dest_dir, exist_ok=True)
+        with os.scandir(src_dir) as entries:
+            for entry in entries:
+                # glob('*.css') skipped dotfiles; keep that behaviour.
+                if entry.name.startswith('.') or not entry.name.endswith(suffixes) or not entry.is_file():
+                    continue
+                dest_path = os.path.join(dest_dir, entry.name)
+                publish_data.fast_copy(entry.path, dest_path)
+                print(f"[+] Copied {entry.path} to {dest_path}")
+
+
+def write_if_changed(path, data):
+    """
+    Write data to path unless the file already holds exactly these bytes, so an
+    unchanged rebuild leaves mtimes (and the publish repo's git status) alone.
+    Returns True if the file was written.
+    """
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def write_file_pair(path, twin_path, data):
+    """
+    Write data to both path and twin_path as two independent files, skipping
+    either one whose content is already up to date. A hard link left behind
+    by an older build is broken first, so an in-place write to one name can't
+    change the other.
+    """
+    try:
+        if os.path.samefile(path, twin_path):
+            os.remove(twin_path)
+    except FileNotFoundError:
+        pass
+    write_if_changed(path, data)
+    write_if_changed(twin_path, data)
+
+
+def render_document_index(document_template, current_timestamp):
+    """
+    Return the per-document index.html bytes: the template with the build
+    timestamp filled in and the auto-generated notice prepended.
+
+    Every document gets the same bytes, so the template is read, patched and
+    encoded once per (template mtime, timestamp) rather than once per document.
+    """
+    return _render_document_index(document_template, os.stat(document_template).st_mtime_ns, current_timestamp)
+
+
+@functools.lru_cache(maxsize=8)
+def _render_document_index(document_template, mtime_ns, current_timestamp):
+    with open(document_template, 'r', encoding='utf-8') as f:
+        template_content = f.read()
+
+    # Replace the timestamp with current date and time
+    template_content = template_content.replace('Последнее обновление: 15.05.2023 14:30', f'Последнее обновление: {current_timestamp}')
+
+    # Prepend autogenerated notice
+    auto_hdr = "<!-- AUTO-GENERATED FILE. Do not edit directly. Run scripts/build_website.py -->\n"
+    return (auto_hdr + template_content).encode('utf-8')
+
+
+# Documents publish concurrently on threads rather than processes: the work is
+# file copying, and workers must see the (possibly overridden) project_root.
+PUBLISH_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def scan_document(doc_id):
+    """
+    Top-level entries of redpen-content/<doc_id> by name, from a single
+    scandir. DirEntry caches its type, so checking for images/, meta.json,
+    illustrations/ etc. costs no further stat() calls.
+    """
+    try:
+        with os.scandir(os.path.join(project_root, 'redpen-content', doc_id)) as it:
+            return {entry.name: entry for entry in it}
+    except OSError:
+        return {}
+
+
+def _entry_is_dir(entries, name):
+    entry = entries.get(name)
+    return entry is not None and entry.is_dir()
+
+
+def _publish_one_document(doc, output_dir, templates_dir, current_timestamp):
+    """Publish one document's images, text, metadata and index page into output_dir/<doc>."""
+    images_dir = os.path.join(project_root, 'redpen-content', doc, 'images')
+    text_dir = os.path.join(project_root, 'redpen-content', doc, 'text')
+    # Skip annotations as they're already converted and in the right place
+    annotations_dir = None
+
+    # Create document-specific output directory
+    doc_output_dir = os.path.join(output_dir, doc)
+    os.makedirs(doc_output_dir, exist_ok=True)
+
+    # Use the document directory directly for content
+    doc_content_dir = doc_output_dir
+
+    # Publish content data directly to the document directory
+    publish_data.publish_data(images_dir, text_dir, annotations_dir, doc_content_dir)
+
+    doc_entries = scan_document(doc)
+
+    # Check if illustrations folder exists and publish its content to images folder
+    illustrations_dir = os.path.join(project_root, 'redpen-content', doc, 'illustrations')
+    if _entry_is_dir(doc_entries, 'illustrations'):
+        images_output = os.path.join(doc_content_dir, "images")
+        publish_data.copy_files(illustrations_dir, images_output, "*", skip_unchanged=True)
+        print(f"[+] Published illustrations from {illustrations_dir} to {images_output}")
+
+    # Copy meta.json to the document directory as metadata.json
+    meta_json_path = os.path.join(project_root, 'redpen-content', doc, 'meta.json')
+    metadata_json_path = os.path.join(doc_content_dir, 'metadata.json')
+    if 'meta.json' in doc_entries:
+        publish_data.fast_copy(meta_json_path, metadata_json_path)
+        print(f"[+] Copied meta.json to {metadata_json_path}")
+
+    # Copy document index template to the document directory with updated timestamp
+    document_template = os.path.join(templates_dir, 'document_index.html')
+    document_index = os.path.join(doc_content_dir, 'index.html')
+    document_index_html = os.path.join(doc_content_dir, 'document_index.html')
+    if os.path.exists(document_template):
+        # document_index.html is kept for compatibility with tests
+        write_file_pair(document_index, document_index_html, render_document_index(document_template, current_timestamp))
+
+        print(f"[+] Copied document index template to {document_index} with updated timestamp")
+        print(f"[+] Also created document_index.html at {document_index_html} for test compatibility")
+
+    # No need for redirect HTML file anymore as we're using the document directory directly
+    # create_redirect_html(doc_output_dir, f"i/{doc}")
+
+    # Clean up only the old nested structure
+    old_dirs = ['i']
+    for old_dir in old_dirs:
+        old_path = os.path.join(doc_output_dir, old_dir)
+        if os.path.exists(old_path) and os.path.isdir(old_path):
+            try:
+                shutil.rmtree(old_path)
+                print(f"[+] Removed old directory: {old_path}")
+            except Exception as e:
+                print(f"[!] Error removing directory {old_path}: {e}")
+
+
 def publish_website_data(target_dir=None, document=None, specific_folders=None):
     """
     Publish data to the target directory
@@ -447,33 +540,23 @@ def publish_website_data(target_dir=None, document=None, specific_folders=None):
             illustrations_dir = os.path.join(project_root, 'redpen-content', document, 'illustrations')
             if os.path.exists(illustrations_dir) and os.path.isdir(illustrations_dir):
                 images_output = os.path.join(doc_content_dir, "images")
-                publish_data.copy_files(illustrations_dir, images_output, "*")
+                publish_data.copy_files(illustrations_dir, images_output, "*", skip_unchanged=True)
                 print(f"[+] Published illustrations from {illustrations_dir} to {images_output}")
 
             # Copy meta.json to the document directory as metadata.json
             meta_json_path = os.path.join(project_root, 'redpen-content', document, 'meta.json')
             metadata_json_path = os.path.join(doc_content_dir, 'metadata.json')
             if os.path.exists(meta_json_path):
-                shutil.copy2(meta_json_path, metadata_json_path)
+                publish_data.fast_copy(meta_json_path, metadata_json_path)
                 print(f"[+] Copied meta.json to {metadata_json_path}")
 
             # Copy document index template to the document directory with updated timestamp
             document_template = os.path.join(templates_dir, 'document_index.html')
             document_index = os.path.join(doc_content_dir, 'index.html')
             if os.path.exists(document_template):
-                # Read the template content
-                with open(document_template, 'r', encoding='utf-8') as f:
-                    template_content = f.read()
-
-                # Replace the timestamp with current date and time
                 current_timestamp = datetime.datetime.now().strftime('%d.%m.%Y %H:%M')
-                template_content = template_content.replace('Последнее обновление: 15.05.2023 14:30', f'Последнее обновление: {current_timestamp}')
-
-                # Prepend autogenerated notice
-                auto_hdr = "<!-- AUTO-GENERATED FILE. Do not edit directly. Run scripts/build_website.py -->\n"
-                # Write the modified content to the output file
-                with open(document_index, 'w', encoding='utf-8') as f:
-                    f.write(auto_hdr + template_content)
+                with open(document_index, 'wb') as f:
+                    f.write(render_document_index(document_template, current_timestamp))
 
                 print(f"[+] Copied document index template to {document_index} with updated timestamp")
 
@@ -494,192 +577,30 @@ def publish_website_data(target_dir=None, document=None, specific_folders=None):
             # Publish data for all documents or specific folders
             documents = get_document_folders(specific_folders)
 
-            for doc in documents:
-                images_dir = os.path.join(project_root, 'redpen-content', doc, 'images')
-                text_dir = os.path.join(project_root, 'redpen-content', doc, 'text')
-                # Skip annotations as they're already converted and in the right place
-                annotations_dir = None
-
-                # Create document-specific output directory
-                doc_output_dir = os.path.join(output_dir, doc)
-                os.makedirs(doc_output_dir, exist_ok=True)
-
-                # Use the document directory directly for content
-                doc_content_dir = doc_output_dir
-
-                # Publish content data directly to the document directory
-                publish_data.publish_data(images_dir, text_dir, annotations_dir, doc_content_dir)
-
-                # Check if illustrations folder exists and publish its content to images folder
-                illustrations_dir = os.path.join(project_root, 'redpen-content', doc, 'illustrations')
-                if os.path.exists(illustrations_dir) and os.path.isdir(illustrations_dir):
-                    images_output = os.path.join(doc_content_dir, "images")
-                    publish_data.copy_files(illustrations_dir, images_output, "*")
-                    print(f"[+] Published illustrations from {illustrations_dir} to {images_output}")
-
-                # Copy meta.json to the document directory as metadata.json
-                meta_json_path = os.path.join(project_root, 'redpen-content', doc, 'meta.json')
-                metadata_json_path = os.path.join(doc_content_dir, 'metadata.json')
-                if os.path.exists(meta_json_path):
-                    shutil.copy2(meta_json_path, metadata_json_path)
-                    print(f"[+] Copied meta.json to {metadata_json_path}")
-
-                # Copy document index template to the document directory with updated timestamp
-                document_template = os.path.join(templates_dir, 'document_index.html')
-                document_index = os.path.join(doc_content_dir, 'index.html')
-                document_index_html = os.path.join(doc_content_dir, 'document_index.html')
-                if os.path.exists(document_template):
-                    # Read the template content
-                    with open(document_template, 'r', encoding='utf-8') as f:
-                        template_content = f.read()
-
-                    # Replace the timestamp with current date and time
-                    current_timestamp = datetime.datetime.now().strftime('%d.%m.%Y %H:%M')
-                    template_content = template_content.replace('Последнее обновление: 15.05.2023 14:30', f'Последнее обновление: {current_timestamp}')
-
-                    # Prepend autogenerated notice
-                    auto_hdr = "<!-- AUTO-GENERATED FILE. Do not edit directly. Run scripts/build_website.py -->\n"
-                    # Write the modified content to the output files
-                    with open(document_index, 'w', encoding='utf-8') as f:
-                        f.write(auto_hdr + template_content)
-
-                    # Also create document_index.html for compatibility with tests
-                    with open(document_index_html, 'w', encoding='utf-8') as f:
-                        f.write(auto_hdr + template_content)
-
-                    print(f"[+] Copied document index template to {document_index} with updated timestamp")
-                    print(f"[+] Also created document_index.html at {document_index_html} for test compatibility")
-
-                # No need for redirect HTML file anymore as we're using the document directory directly
-                # create_redirect_html(doc_output_dir, f"i/{doc}")
-
-                # Clean up only the old nested structure
-                old_dirs = ['i']
-                for old_dir in old_dirs:
-                    old_path = os.path.join(doc_output_dir, old_dir)
-                    if os.path.exists(old_path) and os.path.isdir(old_path):
-                        try:
-                            shutil.rmtree(old_path)
-                            print(f"[+] Removed old directory: {old_path}")
-                        except Exception as e:
-                            print(f"[!] Error removing directory {old_path}: {e}")
+            # Documents publish into disjoint <output_dir>/<doc> trees, so they can run
+            # side by side; one timestamp keeps every document index consistent.
+            current_timestamp = datetime.datetime.now().strftime('%d.%m.%Y %H:%M')
+            if documents:
+                with ThreadPoolExecutor(max_workers=min(PUBLISH_WORKERS, len(documents))) as executor:
+                    futures = [
+                        executor.submit(_publish_one_document, doc, output_dir, templates_dir, current_timestamp)
+                        for doc in documents
+                    ]
+                    for future in as_completed(futures):
+                        future.result()
 
         # Copy template files (CSS, JS, HTML, etc.)
         print("\n=== Copying Template Files ===")
-        # Copy CSS files
-        css_src = os.path.join(templates_dir, 'css')
-        css_dest = os.path.join(output_dir, 'css')
-        if os.path.exists(css_src):
-            publish_data.copy_files(css_src, css_dest, "*.css")
-
-        # Copy JS files
-        js_src = os.path.join(templates_dir, 'js')
-        js_dest = os.path.join(output_dir, 'js')
-        if os.path.exists(js_src):
-            publish_data.copy_files(js_src, js_dest, "*.js")
-
-        # Copy favicon
-        if os.path.exists(templates_dir):
-            publish_data.copy_files(templates_dir, output_dir, "*.svg")
-
-        # Copy the cabinet page (stage 3): index.html, cabinet.js, cabinet.css
-        cabinet_src = os.path.join(templates_dir, 'cabinet')
-        cabinet_dest = os.path.join(output_dir, 'cabinet')
-        if os.path.exists(cabinet_src):
-            for pattern in ("*.html", "*.js", "*.css"):
-                publish_data.copy_files(cabinet_src, cabinet_dest, pattern)
+        copy_template_files(templates_dir, output_dir)
 
         return True
     except Exception as e:
         print(f"Error publishing data: {e}")
         return False
 
-def create_index_page(target_dir=None, specific_folders=None):
-    """
-    Create the main index page with document selection menu
-
-    Args:
-        target_dir (str): Target directory for output
-        specific_folders (list): List of specific folders to include in the index
-    """
-    print("\n=== Creating Index Page with Document Selection Menu ===")
-
-    # Use target_dir if provided, otherwise use default redpen-publish
-    if target_dir:
-        output_dir = target_dir
-    else:
-        output_dir = os.path.join(project_root, 'redpen-publish')
-
-    # Create the index.html file
-    index_path = os.path.join(output_dir, 'index.html')
-
-    # Also create document_index.html at the root level for test compatibility
-    document_index_path = os.path.join(output_dir, 'document_index.html')
-
-    auto_hdr = "<!-- AUTO-GENERATED FILE. Do not edit directly. Run scripts/build_website.py -->\n"
-
-    # Get the list of document folders
-    document_folders = get_document_folders(specific_folders)
-
-    # Create document entries with titles from meta.json if available
-    documents = []
-    for doc_id in document_folders:
-        # Default title if meta.json is not available
-        title = doc_id
-        icon_path = None
-
-        # Try to get title from meta.json
-        meta_json_path = os.path.join(project_root, 'redpen-content', doc_id, 'meta.json')
-        if os.path.exists(meta_json_path):
-            try:
-                import json
-                with open(meta_json_path, 'r', encoding='utf-8') as f:
-                    meta_data = json.load(f)
-                    if 'title' in meta_data:
-                        title = meta_data['title']
-            except Exception as e:
-                print(f"Warning: Could not read title from meta.json for {doc_id}: {e}")
-
-        # Find the first PNG image in the book's images directory
-        images_dir = os.path.join(project_root, 'redpen-content', doc_id, 'images')
-        if os.path.exists(images_dir):
-            try:
-                from PIL import Image
-                png_files = sorted([f for f in os.listdir(images_dir) if f.lower().endswith('.png')])
-                if png_files:
-                    # Get the first PNG file
-                    first_png = png_files[0]
-                    source_image_path = os.path.join(images_dir, first_png)
-
-                    # Create the target directory if it doesn't exist
-                    doc_publish_dir = os.path.join(output_dir, doc_id)
-                    os.makedirs(doc_publish_dir, exist_ok=True)
-
-                    # Resize the image to 150px width and save as cover.png
-                    target_image_path = os.path.join(doc_publish_dir, 'cover.png')
-                    img = Image.open(source_image_path)
-
-                    # Calculate new height to maintain aspect ratio
-                    width_percent = (150 / float(img.size[0]))
-                    new_height = int((float(img.size[1]) * float(width_percent)))
-
-                    # Resize and save
-                    img = img.resize((150, new_height), Image.LANCZOS)
-                    img.save(target_image_path)
-
-                    # Set the icon path relative to the document directory
-                    icon_path = 'cover.png'
-                    print(f"[+] Created cover image for {doc_id}: {target_image_path}")
-            except Exception as e:
-                print(f"Warning: Could not process image for {doc_id}: {e}")
-
-        documents.append({'id': doc_id, 'title': title, 'icon': icon_path})
-
-    # Get current timestamp
-    current_timestamp = datetime.datetime.now().strftime('%d.%m.%Y %H:%M')
-
-    # Create the HTML content - header part
-    html_content = """<!DOCTYPE html>
+# Static parts of the top-level index.html; only the timestamp and the
+# per-document cards are filled in per build.
+_INDEX_HEAD = """<!DOCTYPE html>
 <html lang="ru">
 <head>
   <meta charset="UTF-8" />
@@ -740,35 +661,29 @@ def create_index_page(target_dir=None, specific_folders=None):
 </head>
 <body>"""
 
-    # Add header with dynamic timestamp
-    html_content += f"""
-  <header>RedPen — Красной ручкой <span id="timestamp" style="font-size: 0.7rem; font-weight: normal; opacity: 0.8;">Последнее обновление: {current_timestamp}</span></header>
+_INDEX_HEADER = """
+  <header>RedPen — Красной ручкой <span id="timestamp" style="font-size: 0.7rem; font-weight: normal; opacity: 0.8;">Последнее обновление: {timestamp}</span></header>
 
   <div class="document-list">
     <h1>Выберите документ</h1>
 """
 
-    # Add document cards
-    for doc in documents:
-        # Add icon if available
-        icon_html = ""
-        if doc.get('icon'):
-            icon_html = f"""
+_INDEX_CARD_ICON = """
       <div class="document-icon">
-        <img src="{doc['id']}/{doc['icon']}" alt="{doc['title']}" width="150">
+        <img src="{id}/{icon}" alt="{title}" width="150">
       </div>"""
 
-        html_content += f"""
+_INDEX_CARD = """
     <div class="document-card">
       <div class="document-content">{icon_html}
-        <h2>{doc['title']}</h2>
-        <a href="{doc['id']}/index.html">Открыть документ</a>
+        <h2>{title}</h2>
+        <a href="{id}/index.html">Открыть документ</a>
       </div>
     </div>
 """
 
-    # Close HTML tags with optional editor flag propagation script
-    html_content += """
+# Closes the page, with the optional editor flag propagation script
+_INDEX_FOOTER = """
   </div>
   <script>
   (function(){
@@ -800,13 +715,112 @@ def create_index_page(target_dir=None, specific_folders=None):
 </html>
 """
 
-    # Write the HTML content to the files
-    with open(index_path, 'w', encoding='utf-8') as f:
-        f.write(auto_hdr + html_content)
 
-    # Also create a copy as document_index.html for test compatibility
-    with open(document_index_path, 'w', encoding='utf-8') as f:
-        f.write(auto_hdr + html_content)
+def _document_entry(doc_id, output_dir):
+    """Index-page entry for one document: title from meta.json, plus cover.png
+    generated from the first page image."""
+    # Default title if meta.json is not available
+    title = doc_id
+    icon_path = None
+    doc_entries = scan_document(doc_id)
+
+    # Try to get title from meta.json
+    meta_json_path = os.path.join(project_root, 'redpen-content', doc_id, 'meta.json')
+    if 'meta.json' in doc_entries:
+        try:
+            import json
+            with open(meta_json_path, 'r', encoding='utf-8') as f:
+                meta_data = json.load(f)
+                if 'title' in meta_data:
+                    title = meta_data['title']
+        except Exception as e:
+            print(f"Warning: Could not read title from meta.json for {doc_id}: {e}")
+
+    # Find the first PNG image in the book's images directory
+    images_dir = os.path.join(project_root, 'redpen-content', doc_id, 'images')
+    if 'images' in doc_entries:
+        try:
+            from PIL import Image
+            # First PNG by name: one pass with min() instead of sorting the
+            # whole (hundreds of pages) listing to take element 0
+            with os.scandir(images_dir) as it:
+                first_png = min((e.name for e in it if e.name.lower().endswith('.png')), default=None)
+            if first_png:
+                source_image_path = os.path.join(images_dir, first_png)
+
+                # Create the target directory if it doesn't exist
+                doc_publish_dir = os.path.join(output_dir, doc_id)
+                os.makedirs(doc_publish_dir, exist_ok=True)
+
+                # Resize the image to 150px width and save as cover.png
+                target_image_path = os.path.join(doc_publish_dir, 'cover.png')
+                with Image.open(source_image_path) as img:
+                    # Calculate new height to maintain aspect ratio
+                    width_percent = (150 / float(img.size[0]))
+                    new_height = int((float(img.size[1]) * float(width_percent)))
+
+                    # reducing_gap: box-reduce a full-size page scan by an integer
+                    # factor first, so LANCZOS only runs over ~3x the target size
+                    # (what Image.thumbnail() does, but keeping the exact size).
+                    cover = img.resize((150, new_height), Image.LANCZOS, reducing_gap=3.0)
+                cover.save(target_image_path)
+
+                # Set the icon path relative to the document directory
+                icon_path = 'cover.png'
+                print(f"[+] Created cover image for {doc_id}: {target_image_path}")
+        except Exception as e:
+            print(f"Warning: Could not process image for {doc_id}: {e}")
+
+    return {'id': doc_id, 'title': title, 'icon': icon_path}
+
+
+def create_index_page(target_dir=None, specific_folders=None):
+    """
+    Create the main index page with document selection menu
+
+    Args:
+        target_dir (str): Target directory for output
+        specific_folders (list): List of specific folders to include in the index
+    """
+    print("\n=== Creating Index Page with Document Selection Menu ===")
+
+    # Use target_dir if provided, otherwise use default redpen-publish
+    if target_dir:
+        output_dir = target_dir
+    else:
+        output_dir = os.path.join(project_root, 'redpen-publish')
+
+    # Create the index.html file
+    index_path = os.path.join(output_dir, 'index.html')
+
+    # Also create document_index.html at the root level for test compatibility
+    document_index_path = os.path.join(output_dir, 'document_index.html')
+
+    auto_hdr = "<!-- AUTO-GENERATED FILE. Do not edit directly. Run scripts/build_website.py -->\n"
+
+    # Get the list of document folders
+    document_folders = get_document_folders(specific_folders)
+
+    # Create document entries with titles from meta.json if available. Cover
+    # resizing releases the GIL, so documents are processed side by side;
+    # map() keeps the index in document order.
+    with ThreadPoolExecutor(max_workers=PUBLISH_WORKERS) as executor:
+        documents = list(executor.map(lambda doc_id: _document_entry(doc_id, output_dir), document_folders))
+
+    # Get current timestamp
+    current_timestamp = datetime.datetime.now().strftime('%d.%m.%Y %H:%M')
+
+    # Build the page as a list of parts and join once (no repeated += copies)
+    parts = [auto_hdr, _INDEX_HEAD, _INDEX_HEADER.format(timestamp=current_timestamp)]
+    for doc in documents:
+        # Add icon if available
+        icon_html = _INDEX_CARD_ICON.format(**doc) if doc.get('icon') else ""
+        parts.append(_INDEX_CARD.format(id=doc['id'], title=doc['title'], icon_html=icon_html))
+    parts.append(_INDEX_FOOTER)
+    html_bytes = ''.join(parts).encode('utf-8')
+
+    # Write the HTML content, with document_index.html as a copy for test compatibility
+    write_file_pair(index_path, document_index_path, html_bytes)
 
     print(f"[+] Created index page at {index_path}")
     print(f"[+] Also created document_index.html at {document_index_path} for test compatibility")
@@ -852,6 +866,44 @@ def create_redirect_html(directory, target_path):
 
     print(f"[+] Created redirect file at {redirect_path}")
 
+def commit_all(repo_path, message):
+    """
+    Stage every change in repo_path and commit it.
+
+    Returns (success, committed); committed is False when the working tree
+    was already clean.
+    """
+    success, stdout, stderr = run_command(["git", "status", "--porcelain"], cwd=repo_path)
+    if not success:
+        print("Failed to check git status")
+        return False, False
+
+    if not stdout.strip():
+        return True, False
+
+    success, stdout, stderr = run_command(["git", "add", "."], cwd=repo_path)
+    if not success:
+        print("Failed to add changes")
+        return False, False
+
+    success, stdout, stderr = run_command(["git", "commit", "-m", message], cwd=repo_path)
+    if not success:
+        print("Failed to commit changes")
+        return False, False
+    return True, True
+
+def commits_ahead(repo_path):
+    """Number of local commits not on the upstream branch, or None if unknown"""
+    success, stdout, stderr = run_command(
+        ["git", "rev-list", "--count", "@{upstream}..HEAD"], cwd=repo_path
+    )
+    if not success:
+        return None
+    try:
+        return int(stdout.strip())
+    except ValueError:
+        return None
+
 def push_to_submodule(target_dir=None):
     """Commit and push changes to the redpen-publish repository"""
     # Only push if target_dir is None or is the default redpen-publish directory
@@ -865,33 +917,18 @@ def push_to_submodule(target_dir=None):
 
     submodule_path = os.path.join(project_root, 'redpen-publish')
 
-    # Check if there are changes to commit
-    success, stdout, stderr = run_command("git status --porcelain", cwd=submodule_path)
+    success, committed = commit_all(submodule_path, PUBLISH_COMMIT_MESSAGE)
     if not success:
-        print("Failed to check git status")
         return False
-
-    if not stdout.strip():
+    if not committed:
         print("No changes to commit in redpen-publish")
-        return True
-
-    # Add all changes
-    success, stdout, stderr = run_command("git add .", cwd=submodule_path)
-    if not success:
-        print("Failed to add changes")
-        return False
-
-    # Commit changes
-    success, stdout, stderr = run_command(
-        'git commit -m "Update website content via build script"', 
-        cwd=submodule_path
-    )
-    if not success:
-        print("Failed to commit changes")
-        return False
+        # Only hit the network if an earlier build left commits unpushed.
+        if not commits_ahead(submodule_path):
+            print("Nothing to push")
+            return True
 
     # Push changes
-    success, stdout, stderr = run_command("git push", cwd=submodule_path)
+    success, stdout, stderr = run_command(["git", "push"], cwd=submodule_path)
     if not success:
         print("Failed to push changes")
         return False
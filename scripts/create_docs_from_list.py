@@ -21,9 +21,9 @@ Note:
 import os
 import re
 from docx import Document
-from docx.shared import Inches
-from PIL import Image
-import tempfile
+
+from docx_pages import (DOCX_IMAGE_WIDTH, FILENAME_SEPARATORS_RE, UNSAFE_FILENAME_CHARS_RE,
+                        build_documents, docx_picture, image_files)
 
 # Define the path to the images directory - using images_with_grid instead of images
 IMAGES_DIR = "redpen-content/medinsky11klass/images_with_grid"
@@ -34,6 +34,9 @@ PARAGRAPHS_LIST_FILE = "redpen-content/medinsky11klass/paragraphs_list.txt"
 # Define the offset between image numbers and actual page numbers
 PAGE_OFFSET = 1
 
+# paragraphs_list.txt line: id, title, start_page, end_page (the title may contain commas)
+LIST_LINE_RE = re.compile(r'^([^,]+),\s*(.+),\s*(\d+),\s*(\d+)$')
+
 # Create the output directory if it doesn't exist
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
@@ -57,7 +60,7 @@ def read_paragraphs_list():
 
             # Parse the line: id, title, start_page, end_page
             # Use regex to handle commas within the title
-            match = re.match(r'^([^,]+),\s*(.+),\s*(\d+),\s*(\d+)$', line)
+            match = LIST_LINE_RE.match(line)
             if match:
                 para_id = match.group(1).strip()
                 title = match.group(2).strip()
@@ -73,6 +76,28 @@ def read_paragraphs_list():
 
     return paragraphs
 
+def docx_output_path(paragraph_info):
+    """Path of the .docx file for a paragraphs list entry."""
+    para_id = paragraph_info['id']
+    title = paragraph_info['title']
+
+    # Create the filename based on the paragraph ID and title
+    if para_id.isdigit() or '-' in para_id:
+        # For numbered paragraphs (e.g., "1", "32-33")
+        filename = f"para_{para_id}_{title}"
+    else:
+        # For special sections (e.g., "intro", "chapter_I")
+        filename = f"{para_id}_{title}"
+
+    # Clean up the filename
+    safe_filename = UNSAFE_FILENAME_CHARS_RE.sub('', filename)
+    safe_filename = FILENAME_SEPARATORS_RE.sub('_', safe_filename)
+    safe_filename = safe_filename.lstrip('_')
+
+    output_path = os.path.join(OUTPUT_DIR, f"{safe_filename}.docx")
+
+    return output_path
+
 def create_docx_from_images(paragraph_info):
     """
     Create a .docx document from a group of images.
@@ -96,45 +121,27 @@ def create_docx_from_images(paragraph_info):
     doc = Document()
     doc.add_heading(f"{para_id}. {title}", level=1)
 
-    # Create a temporary directory for image processing
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Add each page as an image
-        for page_num in range(start_page, end_page + 1):
-            # Calculate the image file number (with offset)
-            image_num = page_num + PAGE_OFFSET
-            image_path = os.path.join(IMAGES_DIR, f"page_{image_num:03d}.png")
-
-            if os.path.exists(image_path):
-                # Open the image to get its dimensions
-                with Image.open(image_path) as img:
-                    width, height = img.size
-
-                # Add page marker before the image
-                doc.add_paragraph(f"[[page::{page_num}]]")
-
-                # Add the image to the document
-                # Scale the image to fit within the page width
-                doc.add_picture(image_path, width=Inches(6))
-            else:
-                print(f"Warning: Image for page {page_num} (file: {image_path}) not found.")
-
-        # Create the filename based on the paragraph ID and title
-        if para_id.isdigit() or '-' in para_id:
-            # For numbered paragraphs (e.g., "1", "32-33")
-            filename = f"para_{para_id}_{title}"
-        else:
-            # For special sections (e.g., "intro", "chapter_I")
-            filename = f"{para_id}_{title}"
+    # Add each page as an image
+    for page_num in range(start_page, end_page + 1):
+        # Calculate the image file number (with offset)
+        image_num = page_num + PAGE_OFFSET
+        image_name = f"page_{image_num:03d}.png"
+        image_path = os.path.join(IMAGES_DIR, image_name)
 
-        # Clean up the filename
-        safe_filename = re.sub(r'[^\w\s-]', '', filename)
-        safe_filename = re.sub(r'[\s-]+', '_', safe_filename)
-        safe_filename = safe_filename.lstrip('_')
+        if image_name in image_files(IMAGES_DIR):
+            # Add page marker before the image
+            doc.add_paragraph(f"[[page::{page_num}]]")
 
-        output_path = os.path.join(OUTPUT_DIR, f"{safe_filename}.docx")
+            # Add the image to the document
+            # Scale the image to fit within the page width
+            doc.add_picture(docx_picture(image_path), width=DOCX_IMAGE_WIDTH)
+        else:
+            print(f"Warning: Image for page {page_num} (file: {image_path}) not found.")
+
+    output_path = docx_output_path(paragraph_info)
 
-        # Save the document
-        doc.save(output_path)
+    # Save the document
+    doc.save(output_path)
 
     return output_path
 
@@ -143,24 +150,20 @@ def main():
     # Clean up the output directory
     if os.path.exists(OUTPUT_DIR):
         print(f"Cleaning up output directory: {OUTPUT_DIR}")
-        for file in os.listdir(OUTPUT_DIR):
-            file_path = os.path.join(OUTPUT_DIR, file)
-            if os.path.isfile(file_path):
-                os.remove(file_path)
+        # DirEntry.is_file() answers from readdir, no stat() per file
+        with os.scandir(OUTPUT_DIR) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    os.remove(entry.path)
 
     print("Reading paragraphs list...")
     paragraphs = read_paragraphs_list()
 
     print(f"Found {len(paragraphs)} paragraphs.")
 
-    # Process each paragraph
-    for i, paragraph in enumerate(paragraphs):
-        print(f"Processing {i+1}/{len(paragraphs)}: {paragraph['id']} - {paragraph['title']}")
-        print(f"  Pages: {paragraph['start_page']} to {paragraph['end_page']}")
-
-        # Create a .docx document for this paragraph
-        output_path = create_docx_from_images(paragraph)
-        print(f"  Created: {output_path}")
+    output_paths = [docx_output_path(paragraph) for paragraph in paragraphs]
+    build_documents(create_docx_from_images, paragraphs, output_paths,
+                    lambda paragraph: f"{paragraph['id']} - {paragraph['title']}")
 
 if __name__ == "__main__":
     main()
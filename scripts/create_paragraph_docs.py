@@ -21,13 +21,13 @@ Note:
     - The script expects the images to be named in the format page_XXX.png
 """
 
+import functools
 import os
 import re
 from docx import Document
-from docx.shared import Inches
-from PIL import Image
-import shutil
-import tempfile
+
+from docx_pages import (DOCX_IMAGE_WIDTH, FILENAME_SEPARATORS_RE, UNSAFE_FILENAME_CHARS_RE,
+                        build_documents, docx_picture, image_files)
 
 # Define the path to the images directory
 IMAGES_DIR = "redpen-content/medinsky11klass/images"
@@ -36,9 +36,50 @@ OUTPUT_DIR = "redpen-content/medinsky11klass/paragraphs"
 # Define the offset between image numbers and actual page numbers
 PAGE_OFFSET = 1
 
+# Table of contents entry: § <number>. <title> . . . <page>, or other entries
+# like "Введение", "Глава", etc.
+TOC_ENTRY_RE = re.compile(r'(§\s+\d+(?:—\d+)?\.|\w+)\s+(.*?)(?:\s+\.+\s+)(\d+)$')
+TOC_ENTRY_START_RE = re.compile(r'^[§\w]')
+PARA_NUM_RE = re.compile(r'§\s+(\d+(?:—\d+)?)')
+PAGE_IMAGE_RE = re.compile(r'^page_(\d+)\.png$')
+
 # Create the output directory if it doesn't exist
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+def _toc_logical_lines(lines):
+    """
+    Yield table of contents entries with wrapped titles joined back onto
+    a single line.
+    """
+    current_line = ""
+
+    for line in lines:
+        # Skip the "Оглавление" line
+        if "Оглавление" in line and not TOC_ENTRY_RE.search(line):
+            continue
+
+        # Check if this is a new entry
+        if TOC_ENTRY_RE.search(line):
+            if current_line:
+                yield current_line
+            current_line = line
+        elif line.strip() and current_line:
+            # This might be a continuation of the previous line
+            # Check if it's a continuation or a new entry without a page number yet
+            if TOC_ENTRY_START_RE.match(line.strip()):
+                # This looks like a new entry, but it might be incomplete
+                yield current_line
+                current_line = line
+            else:
+                # This is a continuation of the previous line
+                current_line += " " + line.strip()
+        elif line.strip():
+            # This is a new line but not matching our pattern
+            current_line = line
+
+    if current_line:
+        yield current_line
+
 def parse_toc():
     """
     Parse the table of contents to extract paragraph information.
@@ -108,79 +149,106 @@ def parse_toc():
 Вопросы и задания к главе . . . . . . . . . . . . . . . . . . . . . . . . . . . . . . . . . . . . . . . . 419
     """
 
-    # Regular expression to match paragraph entries
-    # Format: § <number>. <title> . . . <page>
-    # or other entries like "Введение", "Глава", etc.
-    pattern = r'(§\s+\d+(?:—\d+)?\.|\w+)\s+(.*?)(?:\s+\.+\s+)(\d+)$'
-
-    # First, preprocess the lines to handle multi-line entries
-    lines = toc_text.strip().split('\n')
-
-    # Process multi-line entries
-    processed_lines = []
-    current_line = ""
-    current_prefix = ""
-
-    for line in lines:
-        # Skip the "Оглавление" line
-        if "Оглавление" in line and not re.search(pattern, line):
-            continue
-
-        # Check if this is a new entry
-        match = re.search(pattern, line)
-        if match:
-            if current_line:
-                processed_lines.append(current_line)
-            current_line = line
-            current_prefix = match.group(1)
-        elif line.strip() and current_line:
-            # This might be a continuation of the previous line
-            # Check if it's a continuation or a new entry without a page number yet
-            if re.match(r'^[§\w]', line.strip()):
-                # This looks like a new entry, but it might be incomplete
-                # Store the previous line
-                if current_line:
-                    processed_lines.append(current_line)
-                current_line = line
-            else:
-                # This is a continuation of the previous line
-                current_line += " " + line.strip()
-        elif line.strip():
-            # This is a new line but not matching our pattern
-            current_line = line
-
-    if current_line:
-        processed_lines.append(current_line)
-
-    # Now process the lines to extract paragraph information
+    # Fill in each paragraph's end page as soon as the next entry is seen
     paragraphs = []
 
-    for i, line in enumerate(processed_lines):
-        match = re.search(pattern, line)
+    for line in _toc_logical_lines(toc_text.strip().split('\n')):
+        match = TOC_ENTRY_RE.search(line)
         if match:
             prefix, title, page = match.groups()
-
-            # Clean up the title
-            full_title = f"{prefix} {title}".strip()
             start_page = int(page)
-
-            # Try to find the next paragraph to determine the end page
-            end_page = None
-            for j in range(i + 1, len(processed_lines)):
-                next_match = re.search(pattern, processed_lines[j])
-                if next_match:
-                    end_page = int(next_match.group(3)) - 1
-                    break
+            if paragraphs:
+                paragraphs[-1]['end_page'] = start_page - 1
 
             paragraphs.append({
-                'title': full_title,
+                'title': f"{prefix} {title}".strip(),
                 'start_page': start_page,
-                'end_page': end_page
+                'end_page': None
             })
 
     return paragraphs
 
-def create_docx_from_images(paragraph_info, all_paragraphs):
+@functools.lru_cache(maxsize=None)
+def last_page():
+    """The last book page with a scan in IMAGES_DIR (0 when there are none)"""
+    image_nums = (int(m.group(1)) for m in map(PAGE_IMAGE_RE.match, image_files(IMAGES_DIR)) if m)
+    return max(image_nums, default=PAGE_OFFSET) - PAGE_OFFSET
+
+def index_numbered_paragraphs(paragraphs):
+    """
+    Pick out the numbered (§) paragraphs once, with their numbers already
+    parsed, for create_docx_from_images() to resolve unnumbered entries against.
+
+    Returns a list of (title, start_page, end_page, para_num) tuples in table of
+    contents order.
+    """
+    numbered = []
+    for para in paragraphs:
+        if 'title' in para and para['title'].startswith('§'):
+            para_match = PARA_NUM_RE.match(para['title'])
+            if para_match:
+                numbered.append((para['title'], para['start_page'], para['end_page'], para_match.group(1)))
+    return numbered
+
+def docx_output_path(paragraph_info, numbered_paragraphs):
+    """Path of the .docx file for a table of contents entry."""
+    title = paragraph_info['title']
+
+    # Create a safe filename based on paragraph number
+    # First, try to extract the paragraph number from the title
+    para_match = PARA_NUM_RE.match(title)
+
+    # For paragraphs with clear numbering
+    if para_match:
+        para_num = para_match.group(1)
+        output_path = os.path.join(OUTPUT_DIR, f"para_{para_num}.docx")
+    # For special sections
+    elif title.startswith("Глава"):
+        output_path = os.path.join(OUTPUT_DIR, f"chapter_{len(title) > 6 and title[6] or ''}.docx")
+    elif title.startswith("Введение"):
+        output_path = os.path.join(OUTPUT_DIR, "intro.docx")
+    elif title.startswith("Итоги"):
+        output_path = os.path.join(OUTPUT_DIR, "summary.docx")
+    elif title.startswith("Вопросы"):
+        output_path = os.path.join(OUTPUT_DIR, "questions.docx")
+    elif title.startswith("Темы"):
+        output_path = os.path.join(OUTPUT_DIR, "topics.docx")
+    elif title.startswith("Ресурсы"):
+        output_path = os.path.join(OUTPUT_DIR, "resources.docx")
+    else:
+        # For multi-line paragraph entries or continuations, we need to determine which paragraph they belong to
+
+        # Get the start page of this paragraph
+        page_num = paragraph_info['start_page']
+
+        # First, check if this is a continuation of a multi-line paragraph title
+        # Look for paragraphs that have this title as part of their full title
+        found_para = False
+        for para_title, _, _, para_num in numbered_paragraphs:
+            # Check if this paragraph's title contains our title (for multi-line titles)
+            if title in para_title:
+                output_path = os.path.join(OUTPUT_DIR, f"para_{para_num}.docx")
+                found_para = True
+                break
+
+        # If not found as part of a title, check if it's a page within a paragraph's range
+        if not found_para:
+            for _, para_start, para_end, para_num in numbered_paragraphs:
+                if para_start <= page_num and (para_end is None or para_end >= page_num):
+                    output_path = os.path.join(OUTPUT_DIR, f"para_{para_num}.docx")
+                    found_para = True
+                    break
+
+        # If we still couldn't find a matching paragraph, use a cleaned version of the title
+        if not found_para:
+            safe_title = UNSAFE_FILENAME_CHARS_RE.sub('', title)
+            safe_title = FILENAME_SEPARATORS_RE.sub('_', safe_title)
+            safe_title = safe_title.lstrip('_')
+            output_path = os.path.join(OUTPUT_DIR, f"{safe_title}.docx")
+
+    return output_path
+
+def create_docx_from_images(paragraph_info, numbered_paragraphs):
     """
     Create a .docx document from a group of images.
 
@@ -189,7 +257,8 @@ def create_docx_from_images(paragraph_info, all_paragraphs):
             - title: The title of the paragraph
             - start_page: The starting page number
             - end_page: The ending page number (or None if it's the last paragraph in a section)
-        all_paragraphs: A list of all paragraphs from the table of contents
+        numbered_paragraphs: The numbered paragraphs of the table of contents,
+            as returned by index_numbered_paragraphs()
 
     Returns:
         The path to the created document
@@ -198,99 +267,35 @@ def create_docx_from_images(paragraph_info, all_paragraphs):
     start_page = paragraph_info['start_page']
     end_page = paragraph_info['end_page']
 
-    # If end_page is None, use the next paragraph's start_page - 1 or a large number
+    # If end_page is None, the paragraph runs to the last scanned page
     if end_page is None:
-        end_page = 1000  # A large number to include all remaining pages
+        end_page = last_page()
 
     # Create a new document
     doc = Document()
     doc.add_heading(title, level=1)
 
-    # Create a temporary directory for image processing
-    with tempfile.TemporaryDirectory() as temp_dir:
-        # Add each page as an image
-        for page_num in range(start_page, end_page + 1):
-            # Calculate the image file number (with offset)
-            image_num = page_num + PAGE_OFFSET
-            image_path = os.path.join(IMAGES_DIR, f"page_{image_num:03d}.png")
-
-            if os.path.exists(image_path):
-                # Open the image to get its dimensions
-                with Image.open(image_path) as img:
-                    width, height = img.size
-
-                # Add page marker before the image
-                doc.add_paragraph(f"[[page::{page_num}]]")
-
-                # Add the image to the document
-                # Scale the image to fit within the page width
-                doc.add_picture(image_path, width=Inches(6))
-            else:
-                print(f"Warning: Image for page {page_num} (file: {image_path}) not found.")
-
-        # Create a safe filename based on paragraph number
-        # First, try to extract the paragraph number from the title
-        para_match = re.match(r'§\s+(\d+(?:—\d+)?)', title)
-
-        # For paragraphs with clear numbering
-        if para_match:
-            para_num = para_match.group(1)
-            output_path = os.path.join(OUTPUT_DIR, f"para_{para_num}.docx")
-        # For special sections
-        elif title.startswith("Глава"):
-            output_path = os.path.join(OUTPUT_DIR, f"chapter_{len(title) > 6 and title[6] or ''}.docx")
-        elif title.startswith("Введение"):
-            output_path = os.path.join(OUTPUT_DIR, "intro.docx")
-        elif title.startswith("Итоги"):
-            output_path = os.path.join(OUTPUT_DIR, "summary.docx")
-        elif title.startswith("Вопросы"):
-            output_path = os.path.join(OUTPUT_DIR, "questions.docx")
-        elif title.startswith("Темы"):
-            output_path = os.path.join(OUTPUT_DIR, "topics.docx")
-        elif title.startswith("Ресурсы"):
-            output_path = os.path.join(OUTPUT_DIR, "resources.docx")
+    # Add each page as an image
+    for page_num in range(start_page, end_page + 1):
+        # Calculate the image file number (with offset)
+        image_num = page_num + PAGE_OFFSET
+        image_name = f"page_{image_num:03d}.png"
+        image_path = os.path.join(IMAGES_DIR, image_name)
+
+        if image_name in image_files(IMAGES_DIR):
+            # Add page marker before the image
+            doc.add_paragraph(f"[[page::{page_num}]]")
+
+            # Add the image to the document
+            # Scale the image to fit within the page width
+            doc.add_picture(docx_picture(image_path), width=DOCX_IMAGE_WIDTH)
         else:
-            # For multi-line paragraph entries or continuations, we need to determine which paragraph they belong to
-
-            # Get the start page of this paragraph
-            page_num = paragraph_info['start_page']
-
-            # First, check if this is a continuation of a multi-line paragraph title
-            # Look for paragraphs that have this title as part of their full title
-            found_para = False
-            for i, para in enumerate(all_paragraphs):
-                if 'title' in para and para['title'].startswith('§'):
-                    para_title = para['title']
-                    # Check if this paragraph's title contains our title (for multi-line titles)
-                    if title in para_title:
-                        para_match = re.match(r'§\s+(\d+(?:—\d+)?)', para_title)
-                        if para_match:
-                            para_num = para_match.group(1)
-                            output_path = os.path.join(OUTPUT_DIR, f"para_{para_num}.docx")
-                            found_para = True
-                            break
-
-            # If not found as part of a title, check if it's a page within a paragraph's range
-            if not found_para:
-                for i, para in enumerate(all_paragraphs):
-                    if 'title' in para and para['title'].startswith('§'):
-                        para_title = para['title']
-                        para_match = re.match(r'§\s+(\d+(?:—\d+)?)', para_title)
-                        if para_match and para['start_page'] <= page_num and (para['end_page'] is None or para['end_page'] >= page_num):
-                            para_num = para_match.group(1)
-                            output_path = os.path.join(OUTPUT_DIR, f"para_{para_num}.docx")
-                            found_para = True
-                            break
-
-            # If we still couldn't find a matching paragraph, use a cleaned version of the title
-            if not found_para:
-                safe_title = re.sub(r'[^\w\s-]', '', title)
-                safe_title = re.sub(r'[\s-]+', '_', safe_title)
-                safe_title = safe_title.lstrip('_')
-                output_path = os.path.join(OUTPUT_DIR, f"{safe_title}.docx")
-
-        # Save the document
-        doc.save(output_path)
+            print(f"Warning: Image for page {page_num} (file: {image_path}) not found.")
+
+    output_path = docx_output_path(paragraph_info, numbered_paragraphs)
+
+    # Save the document
+    doc.save(output_path)
 
     return output_path
 
@@ -299,24 +304,21 @@ def main():
     # Clean up the output directory
     if os.path.exists(OUTPUT_DIR):
         print(f"Cleaning up output directory: {OUTPUT_DIR}")
-        for file in os.listdir(OUTPUT_DIR):
-            file_path = os.path.join(OUTPUT_DIR, file)
-            if os.path.isfile(file_path):
-                os.remove(file_path)
+        # DirEntry.is_file() answers from readdir, no stat() per file
+        with os.scandir(OUTPUT_DIR) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    os.remove(entry.path)
 
     print("Parsing table of contents...")
     paragraphs = parse_toc()
 
     print(f"Found {len(paragraphs)} paragraphs.")
+    numbered_paragraphs = index_numbered_paragraphs(paragraphs)
 
-    # Process each paragraph
-    for i, paragraph in enumerate(paragraphs):
-        print(f"Processing {i+1}/{len(paragraphs)}: {paragraph['title']}")
-        print(f"  Pages: {paragraph['start_page']} to {paragraph['end_page'] or 'end'}")
-
-        # Create a .docx document for this paragraph
-        output_path = create_docx_from_images(paragraph, paragraphs)
-        print(f"  Created: {output_path}")
+    output_paths = [docx_output_path(paragraph, numbered_paragraphs) for paragraph in paragraphs]
+    build_documents(create_docx_from_images, paragraphs, output_paths,
+                    lambda paragraph: paragraph['title'], args=(numbered_paragraphs,))
 
 if __name__ == "__main__":
     main()
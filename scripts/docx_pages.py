@@ -0,0 +1,81 @@
+"""
+docx_pages.py
+
+Shared helpers for the paragraph document builders (create_paragraph_docs.py,
+create_docs_from_list.py): page image lookup, the downscaled pictures they
+embed in each .docx, and building the documents on a process pool.
+"""
+
+import functools
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from docx.shared import Inches
+from PIL import Image
+
+# Pictures are embedded 6 inches wide; 900 px is 150 DPI at that size
+DOCX_IMAGE_WIDTH = Inches(6)
+DOCX_IMAGE_WIDTH_PX = 900
+
+# Worker processes for building documents; leave a quarter of the cores free
+DOCX_WORKERS = max(1, (os.cpu_count() or 1) * 3 // 4)
+
+UNSAFE_FILENAME_CHARS_RE = re.compile(r'[^\w\s-]')
+FILENAME_SEPARATORS_RE = re.compile(r'[\s-]+')
+
+@functools.lru_cache(maxsize=None)
+def image_files(images_dir):
+    """Names in images_dir, listed once: paragraphs are checked page by page
+    against the same directory, so this replaces a stat() per page."""
+    try:
+        return frozenset(os.listdir(images_dir))
+    except FileNotFoundError:
+        return frozenset()
+
+def docx_picture(image_path):
+    """
+    The page image to embed, downscaled to what 6 inches at 150 DPI can show.
+
+    python-docx stores pictures byte for byte, so embedding the full-size scan
+    carries pixels nobody sees and makes doc.save() deflate megabytes per page.
+    Images already at or below DOCX_IMAGE_WIDTH_PX are embedded as they are.
+    """
+    with Image.open(image_path) as img:
+        if img.width <= DOCX_IMAGE_WIDTH_PX:
+            return image_path
+        height = round(img.height * DOCX_IMAGE_WIDTH_PX / img.width)
+        small = img.convert("RGB").resize((DOCX_IMAGE_WIDTH_PX, height), Image.LANCZOS, reducing_gap=3.0)
+    buf = io.BytesIO()
+    small.save(buf, "JPEG", quality=85)
+    buf.seek(0)
+    return buf
+
+def build_documents(create_doc, paragraphs, output_paths, describe, args=()):
+    """
+    Build one document per paragraph with create_doc(paragraph, *args) on
+    DOCX_WORKERS processes, reporting in input order; describe(paragraph)
+    returns the label printed for each entry.
+
+    Several entries can resolve to the same output path (e.g. a continuation
+    line of a multi-line § title). Built one after another, the last one
+    written won, so only that one is built.
+    """
+    last_index_for_path = {path: i for i, path in enumerate(output_paths)}
+
+    # Each document is independent, CPU-bound python-docx work: build them in
+    # separate processes, then report in input order.
+    with ProcessPoolExecutor(max_workers=DOCX_WORKERS) as executor:
+        futures = {
+            i: executor.submit(create_doc, paragraph, *args)
+            for i, paragraph in enumerate(paragraphs)
+            if last_index_for_path[output_paths[i]] == i
+        }
+        for i, paragraph in enumerate(paragraphs):
+            print(f"Processing {i+1}/{len(paragraphs)}: {describe(paragraph)}")
+            print(f"  Pages: {paragraph['start_page']} to {paragraph['end_page'] or 'end'}")
+            if i in futures:
+                print(f"  Created: {futures[i].result()}")
+            else:
+                print(f"  Skipped: {output_paths[i]} is written by a later entry")
@@ -3,38 +3,62 @@
 extract_images.py
 
 Нарезает входной PDF на по‑страничные PNG‑файлы с заданным масштабом.
+С форматом jpg пишет JPEG (quality 85): кодируется в разы быстрее и
+занимает меньше места, но сайт и create_*_docs.py ждут page_XXX.png.
 
 Usage:
-    python extract_images.py path/to/input.pdf path/to/output_dir [zoom]
+    python extract_images.py path/to/input.pdf path/to/output_dir [zoom] [png|jpg]
 
 Пример:
     python extract_images.py textbook.pdf images/ 2
+    python extract_images.py textbook.pdf scans/ 2 jpg
 """
 
 import sys, os
+import tempfile
 from pdf2image import convert_from_path
 
-def extract_images(pdf_path, out_dir, zoom=2):
+# Rasterization is CPU-bound; pdf2image splits the page range across this many
+# pdftoppm processes. Leave a quarter of the cores for everything else.
+RENDER_WORKERS = max(1, (os.cpu_count() or 1) * 3 // 4)
+
+# Output format -> (pdf2image fmt, file extension, extra pdftoppm options)
+IMAGE_FORMATS = {
+    "png": ("png", "png", {}),
+    "jpg": ("jpeg", "jpg", {"jpegopt": {"quality": 85, "optimize": False, "progressive": False}}),
+}
+
+def extract_images(pdf_path, out_dir, zoom=2, fmt="png"):
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"unsupported image format: {fmt!r} (expected one of {', '.join(IMAGE_FORMATS)})")
+    pdf2image_fmt, ext, extra_options = IMAGE_FORMATS[fmt]
     os.makedirs(out_dir, exist_ok=True)
 
     # Calculate DPI based on zoom factor (default PDF DPI is 72)
     dpi = int(72 * zoom)
 
-    # Convert PDF to images
-    images = convert_from_path(
-        pdf_path,
-        dpi=dpi,
-        output_folder=None,  # Don't save directly, we'll handle that
-        fmt="png",
-        thread_count=4  # Use multiple threads for faster conversion
-    )
-
-    # Save each image
-    for i, image in enumerate(images, start=1):
-        fname = f"page_{i:03d}.png"
-        out_path = os.path.join(out_dir, fname)
-        image.save(out_path)
-        print(f"[+] Saved {out_path}")
+    # pdftoppm writes the images itself into a scratch folder (on the same
+    # filesystem, so the renames below are cheap). Without an output folder,
+    # pdf2image pipes every page back as raw PPM, holds the whole book in memory
+    # as PIL images and re-encodes each one in Python.
+    with tempfile.TemporaryDirectory(dir=out_dir, prefix="._pages_") as scratch_dir:
+        paths = convert_from_path(
+            pdf_path,
+            dpi=dpi,
+            output_folder=scratch_dir,
+            fmt=pdf2image_fmt,
+            thread_count=RENDER_WORKERS,
+            paths_only=True,  # Page order, without loading the images
+            **extra_options,
+        )
+
+        for i, src_path in enumerate(paths, start=1):
+            fname = f"page_{i:03d}.{ext}"
+            out_path = os.path.join(out_dir, fname)
+            os.replace(src_path, out_path)
+            print(f"[+] Saved {out_path}")
+
+    return len(paths)
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
@@ -43,4 +67,5 @@ if __name__ == "__main__":
     pdf_path = sys.argv[1]
     out_dir  = sys.argv[2]
     zoom     = float(sys.argv[3]) if len(sys.argv) > 3 else 2.0
-    extract_images(pdf_path, out_dir, zoom)
+    fmt      = sys.argv[4] if len(sys.argv) > 4 else "png"
+    extract_images(pdf_path, out_dir, zoom, fmt)
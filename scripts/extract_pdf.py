@@ -3,67 +3,20 @@
 import os
 import json
 import PyPDF2
-from pdf2image import convert_from_path
+from extract_images import extract_images as render_page_images
+from extract_text import extract_text as extract_page_text
 import argparse
 
 def extract_text(pdf_path, out_dir):
-    os.makedirs(out_dir, exist_ok=True)
-
-    with open(pdf_path, 'rb') as file:
-        reader = PyPDF2.PdfReader(file)
-        num_pages = len(reader.pages)
-
-        for i in range(num_pages):
-            page_num = f"{i+1:03d}"
-            page = reader.pages[i]
-            text = page.extract_text()
-
-            # Split text into lines and create blocks
-            lines = text.split('\n')
-            text_blocks = []
-
-            for j, line in enumerate(lines):
-                if line.strip():
-                    # Approximate bounding box (PyPDF2 doesn't provide position info)
-                    # We'll use dummy values that will be replaced with real ones when displayed
-                    text_blocks.append({
-                        "id": f"page_{page_num}_line{j:03d}",
-                        "text": line,
-                        "bbox": [0, j*20, 500, j*20+15]  # Dummy values
-                    })
-
-            # Save as JSON
-            out_file = os.path.join(out_dir, f"page_{page_num}.json")
-            with open(out_file, "w", encoding="utf-8") as f:
-                json.dump(text_blocks, f, ensure_ascii=False, indent=2)
-
-            print(f"[+] Saved text data to {out_file}")
-
-    return num_pages
+    # Same extractor as extract_text.py: PyPDF2 on a process pool, one
+    # page_NNN.json per page.
+    return extract_page_text(pdf_path, out_dir)
 
 def extract_images(pdf_path, out_dir, zoom=2.0):
-    os.makedirs(out_dir, exist_ok=True)
-
-    # Calculate DPI based on zoom factor (default PDF DPI is 72)
-    dpi = int(72 * zoom)
-
-    # Convert PDF to images
-    images = convert_from_path(
-        pdf_path,
-        dpi=dpi,
-        output_folder=None,  # Don't save directly, we'll handle that
-        fmt="png",
-        thread_count=4  # Use multiple threads for faster conversion
-    )
-
-    # Save each image
-    for i, image in enumerate(images, start=1):
-        fname = f"page_{i:03d}.png"
-        out_path = os.path.join(out_dir, fname)
-        image.save(out_path)
-        print(f"[+] Saved {out_path}")
-
-    return len(images)
+    # Same renderer as extract_images.py: pdftoppm processes split the page
+    # range and write PNGs straight to disk, instead of every page coming back
+    # through this process as a PIL image to be re-encoded serially.
+    return render_page_images(pdf_path, out_dir, zoom)
 
 def create_annotations(pdf_path, out_dir, base_id, logical_start=1, physical_start=1):
     os.makedirs(out_dir, exist_ok=True)
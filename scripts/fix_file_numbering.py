@@ -2,15 +2,14 @@
 
 import os
 import re
-import glob
 import shutil
+from page_files import scan_page_files
 
 def clean_directory(directory):
     """
     Remove any files with negative numbers in their names
     """
-    pattern = os.path.join(directory, "page_-*.???")
-    files = glob.glob(pattern)
+    files = scan_page_files(directory, prefix="page_-")
     
     for file_path in files:
         print(f"Removing {file_path}")
@@ -24,8 +23,7 @@ def copy_files_from_publish_to_content(source_dir, dest_dir):
     os.makedirs(dest_dir, exist_ok=True)
     
     # Get all files matching the pattern page_*.ext in the source directory
-    pattern = os.path.join(source_dir, "page_*.???")
-    files = glob.glob(pattern)
+    files = scan_page_files(source_dir)
     
     for file_path in files:
         # Extract the file name
@@ -44,8 +42,7 @@ def rename_files_in_directory(directory):
     where YYY is XXX-1 (e.g., page_001.png becomes page_000.png)
     """
     # Get all files matching the pattern page_*.ext
-    pattern = os.path.join(directory, "page_*.???")
-    files = glob.glob(pattern)
+    files = scan_page_files(directory)
     
     # Sort files in reverse order to avoid conflicts
     files.sort(reverse=True)
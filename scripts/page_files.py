@@ -0,0 +1,22 @@
+"""
+page_files.py
+
+Shared helper for the page renumbering scripts (fix_file_numbering.py,
+rename_files.py): list the page_NNN.ext files of a directory.
+"""
+
+import os
+
+def scan_page_files(directory, prefix="page_"):
+    """
+    Paths in directory named <prefix>*.??? (the old glob pattern: any name
+    with a three-character extension), from a single os.scandir() pass.
+    """
+    try:
+        with os.scandir(directory) as entries:
+            return [entry.path for entry in entries
+                    if entry.name.startswith(prefix)
+                    and len(entry.name) >= len(prefix) + 4
+                    and entry.name[-4] == "."]
+    except FileNotFoundError:
+        return []
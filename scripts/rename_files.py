@@ -2,7 +2,7 @@
 
 import os
 import re
-import glob
+from page_files import scan_page_files
 
 def rename_files_in_directory(directory):
     """
@@ -10,8 +10,7 @@ def rename_files_in_directory(directory):
     where YYY is XXX-1 (e.g., page_001.png becomes page_000.png)
     """
     # Get all files matching the pattern page_*.ext
-    pattern = os.path.join(directory, "page_*.???")
-    files = glob.glob(pattern)
+    files = scan_page_files(directory)
     
     # Sort files in reverse order to avoid conflicts
     files.sort(reverse=True)
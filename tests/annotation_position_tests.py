@@ -31,7 +31,6 @@ from playwright.sync_api import sync_playwright
 import socket
 import threading
 import http.server
-import socketserver
 
 # Constants
 DESKTOP_WIDTH = 1280
@@ -102,7 +101,10 @@ def find_free_port():
 def start_http_server(directory, port):
     """Start a simple HTTP server in a separate thread"""
     handler = http.server.SimpleHTTPRequestHandler
-    httpd = socketserver.TCPServer(("", port), handler)
+    # One thread per connection so the browser's parallel CSS/JS/image fetches
+    # aren't queued behind each other. Unlike the bare TCPServer, HTTPServer
+    # sets SO_REUSEADDR, so a re-run doesn't fail on a TIME_WAIT socket.
+    httpd = http.server.ThreadingHTTPServer(("", port), handler)
 
     # Change to the specified directory
     os.chdir(directory)
@@ -361,15 +363,41 @@ def run_tests(update_baseline=False):
     # Create results directory
     os.makedirs(RESULTS_DIR, exist_ok=True)
 
-    # Load baseline positions
-    baseline = load_baseline_positions()
-
     # Set up test content and build the website
     print("\n=== Setting up test content ===")
     content_dir = setup_test_content()
 
-    print("\n=== Building test website ===")
-    publish_dir = build_test_website(content_dir)
+    try:
+        print("\n=== Building test website ===")
+        publish_dir = build_test_website(content_dir)
+
+        return run_position_tests(publish_dir, update_baseline=update_baseline)
+    finally:
+        # Clean up temporary directories
+        try:
+            if os.path.exists(content_dir):
+                print(f"Cleaning up temporary content directory: {content_dir}")
+                shutil.rmtree(content_dir)
+        except Exception as e:
+            print(f"Warning: Failed to clean up content directory: {e}")
+
+        try:
+            if 'publish_dir' in locals() and os.path.exists(publish_dir):
+                print(f"Cleaning up temporary publish directory: {publish_dir}")
+                shutil.rmtree(publish_dir)
+        except Exception as e:
+            print(f"Warning: Failed to clean up publish directory: {e}")
+
+def run_position_tests(publish_dir, update_baseline=False):
+    """
+    Serve publish_dir over HTTP and run the four positioning tests against it.
+
+    Returns whether all tests match the baseline, or None when the baseline was
+    updated instead of compared.
+    """
+    # Load baseline positions
+    baseline = load_baseline_positions()
+    all_pass = None
 
     # Save current directory to restore it later
     original_dir = os.getcwd()
@@ -431,20 +459,7 @@ def run_tests(update_baseline=False):
         # Shutdown the server
         server.shutdown()
 
-        # Clean up temporary directories
-        try:
-            if 'content_dir' in locals() and os.path.exists(content_dir):
-                print(f"Cleaning up temporary content directory: {content_dir}")
-                shutil.rmtree(content_dir)
-        except Exception as e:
-            print(f"Warning: Failed to clean up content directory: {e}")
-
-        try:
-            if 'publish_dir' in locals() and os.path.exists(publish_dir):
-                print(f"Cleaning up temporary publish directory: {publish_dir}")
-                shutil.rmtree(publish_dir)
-        except Exception as e:
-            print(f"Warning: Failed to clean up publish directory: {e}")
+    return all_pass
 
 def test_desktop_width(p, port):
     """Test annotation positioning at desktop width (1280px)"""
@@ -24,6 +24,7 @@ from fastapi.testclient import TestClient
 import config  # noqa: E402  (imported after conftest sets env vars)
 import db  # noqa: E402  (imported after conftest sets env vars)
 import main  # noqa: E402  (imported after conftest sets env vars)
+import storage  # noqa: E402  (imported after conftest sets env vars)
 
 
 def _published_annotations(doc_id: str, page_num_str: str):
@@ -96,6 +97,18 @@ def test_store_rejects_non_object(client):
     assert r.status_code == 400
 
 
+def test_store_accepts_json_that_only_the_stdlib_parses(client):
+    # orjson rejects both; json.loads (what the API used before) accepts them.
+    raw = '{"big": 123456789012345678901234567890, "x": NaN, "y": -Infinity}'
+    r = client.post("/api/store", content=raw, headers={"Content-Type": "application/json"})
+    assert r.status_code == 200
+
+    with open(os.path.join(storage.STORAGE_BASE_DIR, r.json()["path"]), encoding="utf-8") as f:
+        stored = json.load(f)["body"]
+    assert stored["big"] == 123456789012345678901234567890
+    assert stored["x"] != stored["x"] and stored["y"] == float("-inf")
+
+
 def test_store_rejects_invalid_json(client):
     r = client.post(
         "/api/store",
@@ -118,6 +131,52 @@ def test_store_raw_without_bucket(client):
     assert body["relPath"] == f"inbox/{body['dateDir']}/{body['id']}.json"
 
 
+def test_store_raw_size_matches_stored_bytes(client):
+    r = client.post("/api/store-raw", json={"msg": "Привет, «мир»", "n": 1})
+    assert r.status_code == 200
+    body = r.json()
+    abs_path = os.path.join(storage.STORAGE_BASE_DIR, body["relPath"])
+    with open(abs_path, "rb") as f:
+        data = f.read()
+    assert body["size"] == len(data)
+    assert json.loads(data)["body"]["msg"] == "Привет, «мир»"
+
+
+def test_store_raw_keeps_values_only_the_stdlib_parses(client):
+    # _read_json_body retries with json.loads and flags the request, so the
+    # stored file keeps NaN and the big integer instead of orjson's null/error.
+    raw = '{"big": 123456789012345678901234567890, "x": NaN}'
+    r = client.post("/api/store-raw", content=raw, headers={"Content-Type": "application/json"})
+    assert r.status_code == 200
+    body = r.json()
+    with open(os.path.join(storage.STORAGE_BASE_DIR, body["relPath"]), "rb") as f:
+        data = f.read()
+    assert body["size"] == len(data)
+    assert b'"x":NaN' in data and b'"big":123456789012345678901234567890' in data
+
+
+def test_serialize_inbox_stdlib_writes_nan_and_big_ints():
+    obj = {"x": float("nan"), "big": 2 ** 70}
+    assert storage.serialize_inbox(obj, stdlib=True) == b'{"big":1180591620717411303424,"x":NaN}'
+    assert storage.serialize_inbox({"big": 2 ** 70}) == b'{"big":1180591620717411303424}'
+
+
+def test_inbox_dir_is_utc_date():
+    from datetime import datetime, timezone
+
+    before = datetime.now(timezone.utc).strftime("%Y%m%d")
+    day = os.path.basename(storage.get_inbox_dir())
+    after = datetime.now(timezone.utc).strftime("%Y%m%d")
+    assert day in (before, after)
+
+
+def test_serialize_inbox_matches_stdlib_canonical_json():
+    obj = {"b": {"z": 1, "a": [1, "ё"]}, "a": None, 7: "int key"}
+    expected = json.dumps({"b": obj["b"], "a": None, "7": "int key"}, ensure_ascii=False,
+                          separators=(",", ":"), sort_keys=True).encode("utf-8")
+    assert storage.serialize_inbox(obj) == expected
+
+
 def test_store_raw_with_bucket_is_sanitized(client):
     r = client.post("/api/store-raw", json={"bucket": "Editor Drafts", "msg": "hi"})
     assert r.status_code == 200
@@ -200,6 +259,21 @@ def test_page_key_short_and_zfilled_form_are_the_same_page(client):
     assert created["id"] in [a["id"] for a in zfilled_form["annotations"]]
 
 
+def test_large_page_response_is_gzipped(client):
+    doc, page = "medinsky11klass", "44"
+    for i in range(20):
+        r = client.post(f"/api/editor/{doc}/{page}", json={"annType": "comment", "text": f"note {i} " * 10, "coords": [i, i]})
+        assert r.status_code == 200
+
+    r = client.get(f"/api/editor/{doc}/{page}", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers.get("content-encoding") == "gzip"
+    assert len(r.json()["annotations"]) == 20
+
+    small = client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
 @pytest.mark.parametrize("page_key", ["000", "-01"])
 def test_nonstandard_page_keys_support_full_crud_and_publish(client, page_key):
     doc = "medinsky11klass"
@@ -456,6 +530,35 @@ def test_anonymous_store_raw_is_rejected():
     assert r.status_code == 401
 
 
+def test_tail_lines_matches_readlines_slice(tmp_path):
+    path = tmp_path / "api.log"
+    lines = [f"2026-01-01 | INFO | запись {i}\n" for i in range(50)]
+    path.write_text("".join(lines), encoding="utf-8")
+    assert main.tail_lines(str(path), 5) == lines[-5:]
+    assert main.tail_lines(str(path), 500) == lines
+    assert main.tail_lines(str(path), 0) == []
+
+    path.write_text("a\nb\nc", encoding="utf-8")  # no trailing newline
+    assert main.tail_lines(str(path), 2) == ["b\n", "c"]
+    assert main.tail_lines(str(path), 3) == ["a\n", "b\n", "c"]
+
+    path.write_text("", encoding="utf-8")
+    assert main.tail_lines(str(path), 5) == []
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ("2026-01-01T00:00:00 | INFO | redpen.api | stored a | b\n",
+         {"timestamp": "2026-01-01T00:00:00", "level": "INFO", "message": "redpen.api | stored a | b"}),
+        ("ts | only message", {"timestamp": "ts", "level": "INFO", "message": "only message"}),
+        ("  no separators  ", {"timestamp": "", "level": "UNKNOWN", "message": "no separators"}),
+    ],
+)
+def test_parse_log_line(line, expected):
+    assert main.parse_log_line(line) == expected
+
+
 def test_anonymous_logs_page_is_rejected():
     anon = TestClient(main.app)
     assert anon.get("/logs").status_code == 401
@@ -474,6 +577,31 @@ def test_get_legacy_pages_remains_public():
     assert r.status_code == 200
 
 
+def test_get_legacy_page_revalidates_with_etag():
+    anon = TestClient(main.app)
+    r = anon.get("/api/pages/medinsky11klass_page_032")
+    etag = r.headers["etag"]
+    assert etag == f'W/"{r.json()["serverPageSha"]}"'
+
+    r2 = anon.get("/api/pages/medinsky11klass_page_032", headers={"If-None-Match": etag})
+    assert r2.status_code == 304
+    assert r2.content == b""
+
+    r3 = anon.get("/api/pages/medinsky11klass_page_032", headers={"If-None-Match": '"stale"'})
+    assert r3.status_code == 200
+
+
+@pytest.mark.parametrize("header", ["{strong}", '"stale", {weak}', '"a",{strong} , "b"', "*"])
+def test_get_legacy_page_if_none_match_uses_weak_comparison(header):
+    anon = TestClient(main.app)
+    sha = anon.get("/api/pages/medinsky11klass_page_032").json()["serverPageSha"]
+    value = header.format(strong=f'"{sha}"', weak=f'W/"{sha}"')
+
+    r = anon.get("/api/pages/medinsky11klass_page_032", headers={"If-None-Match": value})
+    assert r.status_code == 304
+    assert r.headers["etag"] == f'W/"{sha}"'
+
+
 # ---------------------------------------------------------------------------
 # Auth
 # ---------------------------------------------------------------------------
@@ -583,6 +711,20 @@ def test_cors_preflight_reflects_explicit_origin():
         assert r.headers.get("access-control-allow-credentials") == "true"
 
 
+def test_cors_preflight_is_cacheable_by_browser(client):
+    r = client.options(
+        "/api/health",
+        headers={
+            "Origin": "https://medinsky.net",
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "X-CSRF-Token",
+        },
+    )
+    assert r.status_code == 200
+    assert r.headers.get("access-control-max-age") == str(config.CORS_MAX_AGE_SECONDS)
+    assert "x-csrf-token" in r.headers.get("access-control-allow-headers", "").lower()
+
+
 # ---------------------------------------------------------------------------
 # Optimistic locking (stage 0.6)
 # ---------------------------------------------------------------------------
@@ -152,6 +152,18 @@ def test_admin_can_view_logs(monkeypatch):
     assert c.get("/api/logs").status_code == 200
 
 
+def test_logs_json_counts_total_lines_only_on_request(monkeypatch):
+    monkeypatch.setattr(config, "ADMIN_EMAILS", ["root@example.com"])
+    c, _ = _google_login(monkeypatch, "root@example.com")
+    r = c.get("/api/logs")
+    assert r.status_code == 200
+    assert "total_lines" not in r.json()  # opt-in: it scans the whole log file
+
+    r = c.get("/api/logs?count=1")
+    assert r.status_code == 200
+    assert r.json()["total_lines"] >= r.json()["returned_lines"]
+
+
 # ---------------------------------------------------------------------------
 # Logout / session expiry
 # ---------------------------------------------------------------------------
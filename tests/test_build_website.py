@@ -205,3 +205,192 @@ def test_index_page_lists_document_title(synthetic_project, tmp_path):
     index_html = (target / "index.html").read_text("utf-8")
     assert "Test Book" in index_html          # title from meta.json
     assert f"{DOC}/index.html" in index_html   # link to the document
+
+
+def test_copy_template_files_routes_by_suffix(tmp_path):
+    build = _load_build_website()
+    src = tmp_path / "templates"
+    for rel in ("css/a.css", "css/skip.txt", "js/app.js", "favicon.svg", "root.js",
+                "cabinet/index.html", "cabinet/cabinet.js", "cabinet/.hidden.css"):
+        (src / rel).parent.mkdir(parents=True, exist_ok=True)
+        (src / rel).write_text(rel, encoding="utf-8")
+
+    out = tmp_path / "out"
+    build.copy_template_files(str(src), str(out))
+
+    copied = sorted(str(p.relative_to(out)) for p in out.rglob("*") if p.is_file())
+    assert copied == ["cabinet/cabinet.js", "cabinet/index.html", "css/a.css", "favicon.svg", "js/app.js"]
+
+
+def test_publish_data_copy_files_copies_matching_files(tmp_path):
+    build = _load_build_website()
+    src = tmp_path / "src"
+    src.mkdir()
+    for i in range(20):
+        (src / f"page_{i:03d}.json").write_text(str(i), encoding="utf-8")
+    (src / "notes.txt").write_text("skip", encoding="utf-8")
+
+    dest = tmp_path / "dest"
+    build.publish_data.copy_files(str(src), str(dest), "*.json")
+
+    assert sorted(p.name for p in dest.iterdir()) == [f"page_{i:03d}.json" for i in range(20)]
+    assert (dest / "page_007.json").read_text("utf-8") == "7"
+
+
+def test_publish_data_copy_files_reports_skipped_files(tmp_path, capsys):
+    build = _load_build_website()
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.png").write_bytes(b"a")
+    dest = tmp_path / "dest"
+
+    build.publish_data.copy_files(str(src), str(dest), "*", skip_unchanged=True)
+    assert "[+] Copied" in capsys.readouterr().out
+
+    build.publish_data.copy_files(str(src), str(dest), "*", skip_unchanged=True)
+    out = capsys.readouterr().out
+    assert "[=] Unchanged" in out and "Copied" not in out
+
+
+def test_publish_data_fast_copy_preserves_content_and_mtime(tmp_path):
+    build = _load_build_website()
+    src = tmp_path / "meta.json"
+    src.write_bytes(b'{"title": "Test Book"}')
+    os.utime(src, (1_600_000_000, 1_600_000_000))
+
+    dst = tmp_path / "metadata.json"
+    dst.write_bytes(b"stale and longer than the source file")
+    build.publish_data.fast_copy(str(src), str(dst))
+
+    assert dst.read_bytes() == b'{"title": "Test Book"}'
+    assert int(os.stat(dst).st_mtime) == 1_600_000_000
+
+    # Same size and mtime, different bytes: fast_copy still overwrites.
+    dst.write_bytes(b'{"title": "Old  Book"}')
+    os.utime(dst, (1_600_000_000, 1_600_000_000))
+    build.publish_data.fast_copy(str(src), str(dst))
+    assert dst.read_bytes() == b'{"title": "Test Book"}'
+
+
+def test_get_document_folders_scans_once(synthetic_project, tmp_path):
+    build, _ = synthetic_project
+    content = tmp_path / "redpen-content"
+    (content / "notes").mkdir()            # no images/text/annotations subdir
+    (content / ".cache" / "text").mkdir(parents=True)
+
+    assert build.get_document_folders() == [DOC]
+
+    (content / "newbook" / "text").mkdir(parents=True)
+    assert build.get_document_folders() == [DOC]  # cached for the build
+    build._scan_document_folders.cache_clear()
+    assert sorted(build.get_document_folders()) == [DOC, "newbook"]
+
+
+def test_render_document_index_fills_timestamp_and_tracks_edits(tmp_path):
+    build = _load_build_website()
+    template = tmp_path / "document_index.html"
+    template.write_text("<p>Последнее обновление: 15.05.2023 14:30</p>", encoding="utf-8")
+
+    html = build.render_document_index(str(template), "01.02.2026 10:00").decode("utf-8")
+    assert html.startswith("<!-- AUTO-GENERATED FILE.")
+    assert "Последнее обновление: 01.02.2026 10:00" in html
+
+    template.write_text("<p>edited</p>", encoding="utf-8")
+    os.utime(template, ns=(0, os.stat(template).st_mtime_ns + 1_000_000))
+    assert "edited" in build.render_document_index(str(template), "01.02.2026 10:00").decode("utf-8")
+
+
+def test_index_page_cover_is_150px_wide(synthetic_project, tmp_path):
+    PIL_Image = pytest.importorskip("PIL.Image")
+    build, root = synthetic_project
+    PIL_Image.new("RGB", (600, 800), "white").save(root / "redpen-content" / DOC / "images" / "page_001.png")
+    target = tmp_path / "out"
+    build.create_index_page(str(target))
+
+    with PIL_Image.open(target / DOC / "cover.png") as cover:
+        assert cover.size == (150, 200)
+
+
+def test_write_file_pair_writes_independent_copies(tmp_path):
+    build = _load_build_website()
+    index = tmp_path / "index.html"
+    twin = tmp_path / "document_index.html"
+    twin.write_text("stale", encoding="utf-8")
+
+    build.write_file_pair(str(index), str(twin), b"<html>new</html>")
+    assert index.read_bytes() == twin.read_bytes() == b"<html>new</html>"
+
+    build.write_file_pair(str(index), str(twin), b"<html>newer</html>")
+    assert twin.read_bytes() == b"<html>newer</html>"
+
+    # An in-place write to one name must not reach the other.
+    twin.write_text("<test stub>", encoding="utf-8")
+    assert index.read_bytes() == b"<html>newer</html>"
+
+
+def test_write_file_pair_breaks_link_from_older_build(tmp_path):
+    build = _load_build_website()
+    index = tmp_path / "index.html"
+    twin = tmp_path / "document_index.html"
+    index.write_bytes(b"<html>new</html>")
+    os.link(index, twin)
+
+    build.write_file_pair(str(index), str(twin), b"<html>new</html>")
+    assert not os.path.samefile(index, twin)
+    assert twin.read_bytes() == b"<html>new</html>"
+
+
+def test_rebuild_leaves_unchanged_outputs_untouched(tmp_path):
+    build = _load_build_website()
+    src = tmp_path / "meta.json"
+    src.write_bytes(b'{"title": "Test Book"}')
+    dst = tmp_path / "metadata.json"
+    page = tmp_path / "index.html"
+
+    assert build.publish_data.copy_if_changed(str(src), str(dst)) is True
+    assert build.write_if_changed(str(page), b"<html></html>") is True
+    os.utime(dst, ns=(0, os.stat(src).st_mtime_ns))  # keep the copy's mtime, drop atime
+    os.utime(page, ns=(0, 1_000_000_000))
+
+    assert build.publish_data.copy_if_changed(str(src), str(dst)) is False
+    assert os.stat(dst).st_atime_ns == 0           # not rewritten
+    assert build.write_if_changed(str(page), b"<html></html>") is False
+    assert os.stat(page).st_mtime_ns == 1_000_000_000
+    assert build.write_if_changed(str(page), b"<html>v2</html>") is True
+
+
+@pytest.fixture()
+def git_identity(monkeypatch):
+    for key, value in (("GIT_AUTHOR_NAME", "t"), ("GIT_AUTHOR_EMAIL", "t@example.com"),
+                       ("GIT_COMMITTER_NAME", "t"), ("GIT_COMMITTER_EMAIL", "t@example.com")):
+        monkeypatch.setenv(key, value)
+
+
+def test_commit_all_commits_once_then_reports_clean(tmp_path, git_identity):
+    build = _load_build_website()
+    assert build.run_command(["git", "init", "-q"], cwd=str(tmp_path))[0]
+    (tmp_path / "index.html").write_text("<html></html>", encoding="utf-8")
+
+    assert build.commit_all(str(tmp_path), "publish") == (True, True)
+    assert build.commit_all(str(tmp_path), "publish") == (True, False)
+
+    (tmp_path / "index.html").unlink()  # deletions are staged too
+    assert build.commit_all(str(tmp_path), "publish") == (True, True)
+    assert build.run_command(["git", "status", "--porcelain"], cwd=str(tmp_path))[1] == ""
+
+
+def test_commits_ahead_counts_unpushed_commits(tmp_path, git_identity):
+    build = _load_build_website()
+    origin, clone = tmp_path / "origin.git", tmp_path / "clone"
+    assert build.run_command(["git", "init", "-q", "--bare", str(origin)])[0]
+    assert build.run_command(["git", "clone", "-q", str(origin), str(clone)])[0]
+    assert build.commits_ahead(str(clone)) is None  # no upstream yet
+
+    (clone / "index.html").write_text("<html></html>", encoding="utf-8")
+    assert build.run_command(["git", "add", "."], cwd=str(clone))[0]
+    assert build.run_command(["git", "commit", "-q", "-m", "one"], cwd=str(clone))[0]
+    assert build.run_command(["git", "push", "-q", "-u", "origin", "HEAD"], cwd=str(clone))[0]
+    assert build.commits_ahead(str(clone)) == 0
+
+    assert build.run_command(["git", "commit", "-q", "--allow-empty", "-m", "two"], cwd=str(clone))[0]
+    assert build.commits_ahead(str(clone)) == 1
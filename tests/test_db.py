@@ -99,6 +99,23 @@ def test_expired_session_is_evicted():
     assert row is None
 
 
+def test_create_session_sweeps_abandoned_expired_sessions():
+    from datetime import datetime, timedelta
+
+    user = db.get_or_create_user_token("erin")
+    stale_id = db.create_session(user["id"])
+    live_id = db.create_session(user["id"])
+    conn = db.get_connection()
+    past = (datetime.utcnow() - timedelta(seconds=1)).isoformat()
+    conn.execute("UPDATE sessions SET expires_at = ? WHERE id = ?", (past, stale_id))
+    conn.commit()
+
+    db.create_session(user["id"])
+    ids = {r["id"] for r in conn.execute("SELECT id FROM sessions").fetchall()}
+    assert stale_id not in ids
+    assert live_id in ids
+
+
 def test_allowlist_crud():
     assert db.list_allowlist() == []
 
@@ -69,3 +69,18 @@ def test_export_filters_by_doc_id(tmp_path):
     assert count == 1
     assert os.path.exists(os.path.join(out, "doc1", "annotations", "page_006.json"))
     assert not os.path.exists(os.path.join(out, "doc2", "annotations", "page_006.json"))
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_export_fsync_follows_config(tmp_path, monkeypatch, enabled):
+    for page in ("006", "007", "008"):
+        db.upsert_annotation_db("doc1", page, "ann-1", "comment", "hi")
+    db.upsert_annotation_db("doc2", "006", "ann-1", "comment", "hi")
+    calls = {"fsync": 0, "sync": 0}
+    monkeypatch.setattr(config, "FSYNC_WRITES", enabled)
+    monkeypatch.setattr(export_annotations.os, "fsync", lambda fd: calls.__setitem__("fsync", calls["fsync"] + 1))
+    monkeypatch.setattr(export_annotations.os, "sync", lambda: calls.__setitem__("sync", calls["sync"] + 1))
+
+    assert export_annotations.run(str(tmp_path / "out")) == 4
+    # One per page file plus one per annotations directory; never a host-wide sync().
+    assert calls == ({"fsync": 4 + 2, "sync": 0} if enabled else {"fsync": 0, "sync": 0})
@@ -48,11 +48,80 @@ def test_render_page_excludes_deleted():
     assert [a["id"] for a in rendered] == ["ann-2"]
 
 
+def test_render_page_with_sha_cached_until_page_write():
+    db.upsert_annotation_db("doc1", "006", "ann-1", "comment", "one")
+    first, sha1 = publisher.render_page_with_sha("doc1", "006")
+    again, sha_again = publisher.render_page_with_sha("doc1", "006")
+    assert again is first and sha_again == sha1
+    assert sha1 == publisher.compute_page_sha(publisher.render_page("doc1", "006"))
+
+    # A write to another page doesn't invalidate this one.
+    db.upsert_annotation_db("doc1", "007", "ann-9", "comment", "other")
+    assert publisher.render_page_with_sha("doc1", "006")[0] is first
+
+    db.upsert_annotation_db("doc1", "006", "ann-1", "comment", "edited")
+    updated, sha2 = publisher.render_page_with_sha("doc1", "006")
+    assert updated[0]["text"] == "edited" and sha2 != sha1
+
+    db.soft_delete_annotation("doc1", "006", "ann-1")
+    assert publisher.render_page_with_sha("doc1", "006")[0] == []
+
+
+def test_render_page_with_sha_sees_writes_from_another_connection():
+    import sqlite3
+
+    db.upsert_annotation_db("doc1", "006", "ann-1", "comment", "one")
+    first, sha1 = publisher.render_page_with_sha("doc1", "006")
+
+    # e.g. import_annotations.py or a manual sqlite3 session in another process
+    other = sqlite3.connect(config.DB_PATH)
+    other.execute("UPDATE annotations SET text = 'edited elsewhere' WHERE ann_id = 'ann-1'")
+    other.commit()
+    other.close()
+
+    updated, sha2 = publisher.render_page_with_sha("doc1", "006")
+    assert updated[0]["text"] == "edited elsewhere" and sha2 != sha1
+
+
 def test_compute_page_sha_is_deterministic():
     rendered = [{"id": "a", "text": "x", "annType": "comment"}]
     assert publisher.compute_page_sha(rendered) == publisher.compute_page_sha(list(rendered))
 
 
+def test_compute_page_sha_matches_stdlib_canonical_json():
+    import hashlib
+
+    rendered = [
+        {"id": "a", "text": "Привет «мир»", "annType": "main", "coords": [1, 2]},
+        {"annType": "general", "text": "x", "id": "b"},
+        # Every value type render_page/render_drafts emit: escapes, astral
+        # characters, large/negative integer coords, the draft flag.
+        {"id": "c", "text": "\"q\" \\ \t\n\u2028 😀", "annType": "comment",
+         "coords": [-5, 2 ** 40], "draft": True},
+    ]
+    canonical = json.dumps(rendered, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    assert publisher.compute_page_sha(rendered) == hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def test_compute_page_sha_blake3_falls_back_to_sha256_without_package(monkeypatch):
+    rendered = [{"id": "a", "text": "x", "annType": "comment"}]
+    expected = publisher.compute_page_sha(rendered)
+    monkeypatch.setattr(config, "PAGE_SHA_ALGO", "blake3")
+    monkeypatch.setattr(publisher, "blake3", None)
+    assert publisher.compute_page_sha(rendered) == expected
+
+
+def test_compute_page_sha_blake2b(monkeypatch):
+    import hashlib
+
+    rendered = [{"id": "a", "text": "x", "annType": "comment"}]
+    monkeypatch.setattr(config, "PAGE_SHA_ALGO", "blake2b")
+    canonical = json.dumps(rendered, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    sha = publisher.compute_page_sha(rendered)
+    assert sha == hashlib.blake2b(canonical, digest_size=32).hexdigest()
+    assert len(sha) == 64
+
+
 def test_compute_page_sha_changes_with_content():
     a = [{"id": "a", "text": "x", "annType": "comment"}]
     b = [{"id": "a", "text": "y", "annType": "comment"}]
@@ -108,6 +177,31 @@ def test_publish_page_is_idempotent(tmp_path):
     assert first == second
 
 
+def test_serialize_page_matches_stdlib_pretty_json():
+    # orjson must keep writing the bytes json.dumps used to, so existing
+    # published files don't change (git snapshot diffs, nginx ETags).
+    rendered = [
+        {"id": "a", "text": "Текст «цитата»\n", "annType": "main", "coords": [1, 2]},
+        {"id": "b", "text": "", "annType": "general"},
+        {"id": "c", "text": "\"q\" \\ \t\u2028 😀", "annType": "comment", "coords": [-5, 0], "draft": True},
+    ]
+    expected = json.dumps(rendered, ensure_ascii=False, indent=2).encode("utf-8")
+    assert publisher.serialize_page(rendered) == expected
+    assert publisher.serialize_page([]) == b"[]"
+    compact = json.dumps(rendered, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    assert publisher.serialize_page(rendered, pretty=False) == compact
+
+
+def test_publish_page_writes_indented_json_by_default(tmp_path):
+    # The publish tree goes into the redpen-publish git clone: keep it diffable.
+    assert config.PUBLISH_PRETTY_JSON is True
+    db.upsert_annotation_db("doc1", "006", "ann-1", "comment", "hi")
+    assert publisher.publish_page("doc1", "006") is True
+    path = os.path.join(config.PUBLISH_DIR, "doc1", "annotations", "page_006.json")
+    with open(path, "rb") as f:
+        assert f.read() == publisher.serialize_page(publisher.render_page("doc1", "006"))
+
+
 def test_render_drafts_bare_array_with_draft_flag():
     db.upsert_annotation_db("doc1", "006", "d-1", "comment", "wip", coord_x=3, coord_y=4, status="draft")
     rendered = publisher.render_drafts("doc1", "006")
@@ -160,6 +254,61 @@ def test_publish_page_removes_stale_drafts_sidecar(tmp_path):
     assert not os.path.exists(drafts_path)
 
 
+def test_publish_page_skips_rewrite_of_unchanged_page(tmp_path, monkeypatch):
+    db.upsert_annotation_db("doc1", "006", "p-1", "comment", "live")
+    assert publisher.publish_page("doc1", "006") is True
+
+    writes = []
+    real_write = publisher._atomic_write_json
+    monkeypatch.setattr(publisher, "_atomic_write_json", lambda t, r: writes.append(t) or real_write(t, r))
+
+    assert publisher.publish_page("doc1", "006") is True
+    assert writes == []
+
+    db.upsert_annotation_db("doc1", "006", "p-1", "comment", "edited")
+    assert publisher.publish_page("doc1", "006") is True
+    assert len(writes) == 1
+
+    assert publisher.publish_page("doc1", "006", force=True) is True
+    assert len(writes) == 2
+
+
+@pytest.mark.parametrize("enabled", [False, True])
+def test_publish_page_fsync_follows_config(monkeypatch, enabled):
+    calls = []
+    monkeypatch.setattr(config, "FSYNC_WRITES", enabled)
+    monkeypatch.setattr(publisher.os, "fsync", lambda fd: calls.append(fd))
+    db.upsert_annotation_db("doc1", "006", "p-1", "comment", "live")
+    assert publisher.publish_page("doc1", "006") is True
+    assert bool(calls) is enabled
+
+
+def test_publish_page_recreates_wiped_annotations_dir():
+    import shutil
+
+    db.upsert_annotation_db("doc1", "006", "p-1", "comment", "live")
+    assert publisher.publish_page("doc1", "006") is True
+    shutil.rmtree(config.PUBLISH_DIR)
+
+    db.upsert_annotation_db("doc1", "006", "p-1", "comment", "edited")
+    assert publisher.publish_page("doc1", "006") is True
+    path = os.path.join(config.PUBLISH_DIR, "doc1", "annotations", "page_006.json")
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)[0]["text"] == "edited"
+
+
+def test_failed_publish_leaves_no_temp_file(monkeypatch):
+    db.upsert_annotation_db("doc1", "006", "p-1", "comment", "live")
+
+    def boom(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(publisher.os, "replace", boom)
+    assert publisher.publish_page("doc1", "006") is False
+    ann_dir = os.path.join(config.PUBLISH_DIR, "doc1", "annotations")
+    assert [f for f in os.listdir(ann_dir) if f.startswith("._tmp_")] == []
+
+
 def test_publish_all_counts_pages(tmp_path):
     db.upsert_annotation_db("doc1", "006", "ann-1", "comment", "one")
     db.upsert_annotation_db("doc1", "007", "ann-1", "comment", "one")
@@ -20,3 +20,16 @@ def test_save_inbox_writes_world_readable_file():
     abs_path = os.path.join(storage.STORAGE_BASE_DIR, rel_path)
     mode = stat.S_IMODE(os.stat(abs_path).st_mode)
     assert mode & stat.S_IROTH, f"expected world-readable, got {oct(mode)}"
+
+
+def test_save_inbox_overwrites_existing_filename():
+    first = storage.save_inbox({"v": 1}, filename="fixed-name.json")
+    second = storage.save_inbox({"v": 2}, filename="fixed-name.json")
+    assert first == second
+    abs_path = os.path.join(storage.STORAGE_BASE_DIR, second)
+    with open(abs_path, encoding="utf-8") as f:
+        assert f.read() == '{"v":2}'
+    mode = stat.S_IMODE(os.stat(abs_path).st_mode)
+    assert mode & stat.S_IROTH, f"expected world-readable, got {oct(mode)}"
+    leftovers = [n for n in os.listdir(os.path.dirname(abs_path)) if n.startswith("._tmp_")]
+    assert leftovers == []